@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import DailyRollup
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    """Read-only admin interface for daily rollups."""
+    list_display = ['day', 'priority', 'created', 'resolved', 'reopened', 'deleted', 'overdue']
+    list_filter = ['priority']
+    date_hierarchy = 'day'
+    ordering = ['-day', 'priority']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from analytics.models import DailyRollup
+from todos.models import Todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Build daily rollup history from existing TODOs, one date range at a time. '
+        'Creations come from created_at; resolutions are approximated by the '
+        'updated_at of TODOs that are resolved now, and the daily overdue level follows '
+        'from the due dates and those resolution days. Reopen and delete history '
+        'cannot be recovered and is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to backfill (YYYY-MM-DD).')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day to backfill (YYYY-MM-DD).')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days aggregated per query (default: 31).')
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='Overwrite created/resolved/overdue counts of existing rollup rows instead of skipping them.',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1.')
+
+        bounds = Todo.objects.aggregate(first=Min('created_at'), last=Max('updated_at'))
+        if bounds['first'] is None:
+            self.stdout.write('No TODOs to backfill.')
+            return
+        since = options['since'] or timezone.localdate(bounds['first'])
+        # Overdue TODOs stay overdue after the last write, so run up to today.
+        until = options['until'] or max(timezone.localdate(bounds['last']), timezone.localdate())
+        if since > until:
+            raise CommandError('--since must not be after --until.')
+
+        chunk = timedelta(days=options['chunk_days'])
+        total = 0
+        start = since
+        while start <= until:
+            end = min(start + chunk, until + timedelta(days=1))
+            written = self.backfill_range(start, end, options['replace'])
+            total += written
+            self.stdout.write(f'{start} to {end - timedelta(days=1)}: {written} rollup rows')
+            start = end
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {total} rollup rows from {since} to {until}.'))
+
+    def backfill_range(self, start, end, replace):
+        """Aggregate and upsert rollups for days in ``[start, end)``."""
+        lower = timezone.make_aware(datetime.combine(start, time.min))
+        upper = timezone.make_aware(datetime.combine(end, time.min))
+        counts = defaultdict(lambda: {'created': 0, 'resolved': 0, 'overdue': 0})
+
+        created = (
+            Todo.objects.filter(created_at__gte=lower, created_at__lt=upper)
+            .annotate(day=TruncDate('created_at'))
+            .order_by()
+            .values('day', 'priority')
+            .annotate(n=Count('pk'))
+        )
+        for row in created:
+            counts[row['day'], row['priority']]['created'] = row['n']
+
+        resolved = (
+            Todo.objects.filter(is_resolved=True, updated_at__gte=lower, updated_at__lt=upper)
+            .annotate(day=TruncDate('updated_at'))
+            .order_by()
+            .values('day', 'priority')
+            .annotate(n=Count('pk'))
+        )
+        for row in resolved:
+            counts[row['day'], row['priority']]['resolved'] = row['n']
+
+        # A TODO is overdue at the end of every day after its due date, from
+        # the day it was created until the day it was resolved.
+        overdue = (
+            Todo.objects.filter(due_date__lt=end - timedelta(days=1), created_at__lt=upper)
+            .exclude(is_resolved=True, updated_at__lt=lower)
+            .values_list('priority', 'due_date', 'created_at', 'is_resolved', 'updated_at')
+        )
+        for priority, due_date, created_at, is_resolved, updated_at in overdue.iterator():
+            first = max(due_date + timedelta(days=1), timezone.localdate(created_at), start)
+            last = min(timezone.localdate(updated_at), end) if is_resolved else end
+            for offset in range((last - first).days):
+                counts[first + timedelta(days=offset), priority]['overdue'] += 1
+
+        rollups = [
+            DailyRollup(day=day, priority=priority, **values)
+            for (day, priority), values in sorted(counts.items())
+        ]
+        with transaction.atomic():
+            if replace:
+                DailyRollup.objects.bulk_create(
+                    rollups,
+                    update_conflicts=True,
+                    unique_fields=['day', 'priority'],
+                    update_fields=['created', 'resolved', 'overdue'],
+                )
+            else:
+                DailyRollup.objects.bulk_create(rollups, ignore_conflicts=True)
+        return len(rollups)
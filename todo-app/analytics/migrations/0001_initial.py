@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('resolved', models.PositiveIntegerField(default=0)),
+                ('reopened', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'daily rollup',
+                'verbose_name_plural': 'daily rollups',
+                'ordering': ['day', 'priority'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'priority'), name='dailyrollup_day_priority_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from todos.models import Todo
+
+
+class DailyRollup(models.Model):
+    """Per-day, per-priority counts of TODO lifecycle events.
+
+    ``overdue`` is a level rather than an event: the number of unresolved
+    TODOs whose due date had passed, as of the end of the day (or, for
+    today, as of now).
+    """
+
+    EVENTS = ('created', 'resolved', 'reopened', 'deleted')
+
+    day = models.DateField()
+    priority = models.CharField(max_length=10, choices=Todo.PRIORITY_CHOICES)
+    created = models.PositiveIntegerField(default=0)
+    resolved = models.PositiveIntegerField(default=0)
+    reopened = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day', 'priority']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'priority'], name='dailyrollup_day_priority_unique'),
+        ]
+        verbose_name = 'daily rollup'
+        verbose_name_plural = 'daily rollups'
+
+    def __str__(self):
+        return f'{self.day} ({self.priority})'
+
+    @classmethod
+    def record(cls, event, priority, day=None, count=1):
+        """Add ``count`` to one event counter for ``day`` (today by default).
+
+        Runs in the caller's transaction, so a rolled-back write never shows
+        up in the rollups.
+        """
+        if event not in cls.EVENTS:
+            raise ValueError(f'Unknown rollup event: {event}')
+        day = day or timezone.localdate()
+        increment = {event: F(event) + count}
+        if cls.objects.filter(day=day, priority=priority).update(**increment):
+            return
+        if day == timezone.localdate():
+            # First event of the day: open today's rows with the overdue level.
+            cls.refresh_overdue(day)
+            cls.objects.filter(day=day, priority=priority).update(**increment)
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(day=day, priority=priority, **{event: count})
+        except IntegrityError:
+            # Another writer created the row first; fall back to incrementing it.
+            cls.objects.filter(day=day, priority=priority).update(**increment)
+
+    @classmethod
+    def refresh_overdue(cls, day=None):
+        """Store the current overdue level of every priority on ``day`` (today by default).
+
+        Creates the day's rows that don't exist yet; event counters are left
+        as they are. Only meaningful for today, since it reads the TODOs as
+        they are now.
+        """
+        day = day or timezone.localdate()
+        counts = dict(
+            Todo.objects.filter(is_resolved=False, due_date__lt=day)
+            .order_by()
+            .values_list('priority')
+            .annotate(n=Count('pk'))
+        )
+        cls.objects.bulk_create(
+            [cls(day=day, priority=value, overdue=counts.get(value, 0)) for value, _ in Todo.PRIORITY_CHOICES],
+            update_conflicts=True,
+            unique_fields=['day', 'priority'],
+            update_fields=['overdue'],
+        )
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from todos.models import Todo
+from .models import DailyRollup
+
+
+def overdue_priority(values, today):
+    """The priority a TODO counts under in the overdue level, or ``None`` if it isn't overdue."""
+    if values is None or values['is_resolved'] or not values['due_date'] or values['due_date'] >= today:
+        return None
+    return values['priority']
+
+
+def current_values(todo):
+    return {'is_resolved': todo.is_resolved, 'due_date': todo.due_date, 'priority': todo.priority}
+
+
+@receiver(post_save, sender=Todo)
+def record_todo_saved(sender, instance, created, **kwargs):
+    """Count creations and resolved/reopened transitions, and keep today's overdue level.
+
+    Covers every write path that goes through ``Todo.save()``: the views in
+    ``todos.views`` as well as admin forms and ``list_editable``.
+    """
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_persisted_values', None)
+    if created:
+        DailyRollup.record('created', instance.priority)
+        if instance.is_resolved:
+            DailyRollup.record('resolved', instance.priority)
+    elif previous and previous['is_resolved'] != instance.is_resolved:
+        DailyRollup.record('resolved' if instance.is_resolved else 'reopened', instance.priority)
+
+    # The level only moves when a write adds, removes or re-prioritizes an
+    # overdue TODO (or at midnight, which the next day's rows pick up).
+    today = timezone.localdate()
+    if overdue_priority(previous, today) != overdue_priority(current_values(instance), today):
+        DailyRollup.refresh_overdue(today)
+
+
+@receiver(post_delete, sender=Todo)
+def record_todo_deleted(sender, instance, **kwargs):
+    DailyRollup.record('deleted', instance.priority)
+    today = timezone.localdate()
+    if overdue_priority(current_values(instance), today):
+        DailyRollup.refresh_overdue(today)
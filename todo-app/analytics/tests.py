@@ -0,0 +1,186 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from todos.models import Todo
+from .models import DailyRollup
+
+
+def rollup_for(priority, day=None):
+    return DailyRollup.objects.get(day=day or timezone.localdate(), priority=priority)
+
+
+# ============================================
+# ROLLUP MAINTENANCE TESTS
+# ============================================
+
+class DailyRollupRecordTest(TestCase):
+    """Test cases for incrementally maintained rollups"""
+
+    def test_create_counts(self):
+        """Test creating TODOs increments the created counter"""
+        Todo.objects.create(title='One', priority='high')
+        Todo.objects.create(title='Two', priority='high')
+        Todo.objects.create(title='Three', priority='low', is_resolved=True)
+        self.assertEqual(rollup_for('high').created, 2)
+        self.assertEqual(rollup_for('low').created, 1)
+        self.assertEqual(rollup_for('low').resolved, 1)
+
+    def test_toggle_view_counts_resolved_and_reopened(self):
+        """Test the toggle view records resolve and reopen transitions"""
+        todo = Todo.objects.create(title='Toggle', priority='medium')
+        url = reverse('todo-toggle', args=[todo.pk])
+        self.client.get(url)
+        self.client.get(url)
+        rollup = rollup_for('medium')
+        self.assertEqual(rollup.resolved, 1)
+        self.assertEqual(rollup.reopened, 1)
+
+    def test_update_without_status_change_is_not_counted(self):
+        """Test editing other fields leaves resolved counts alone"""
+        todo = Todo.objects.create(title='Edit me', priority='low')
+        self.client.post(reverse('todo-update', args=[todo.pk]), {'title': 'Edited', 'priority': 'low'})
+        self.assertEqual(rollup_for('low').resolved, 0)
+
+    def test_delete_counts(self):
+        """Test deleting a TODO and its subtasks counts each row"""
+        parent = Todo.objects.create(title='Parent', priority='high')
+        Todo.objects.create(title='Child', priority='high', parent=parent)
+        self.client.post(reverse('todo-delete', args=[parent.pk]))
+        self.assertEqual(rollup_for('high').deleted, 2)
+
+    def test_overdue_level_follows_writes(self):
+        """Test today's overdue level tracks TODOs becoming and ceasing to be overdue"""
+        yesterday = timezone.localdate() - timedelta(days=1)
+        late = Todo.objects.create(title='Late', priority='high', due_date=yesterday)
+        Todo.objects.create(title='On time', priority='high', due_date=timezone.localdate())
+        self.assertEqual(rollup_for('high').overdue, 1)
+        self.assertEqual(rollup_for('low').overdue, 0)
+
+        late.priority = 'low'
+        late.save()
+        self.assertEqual((rollup_for('high').overdue, rollup_for('low').overdue), (0, 1))
+        self.client.get(reverse('todo-toggle', args=[late.pk]))
+        self.assertEqual(rollup_for('low').overdue, 0)
+        self.client.get(reverse('todo-toggle', args=[late.pk]))
+        self.assertEqual(rollup_for('low').overdue, 1)
+        late.delete()
+        self.assertEqual(rollup_for('low').overdue, 0)
+
+    def test_first_event_of_the_day_records_existing_overdue(self):
+        """Test today's rows start from the overdue TODOs left from earlier days"""
+        Todo.objects.create(title='Late', priority='medium', due_date=timezone.localdate() - timedelta(days=3))
+        DailyRollup.objects.all().delete()
+        Todo.objects.create(title='Unrelated', priority='low')
+        self.assertEqual(rollup_for('medium').overdue, 1)
+        self.assertEqual(rollup_for('low').created, 1)
+
+    def test_unknown_event_rejected(self):
+        """Test recording an unknown event raises"""
+        with self.assertRaises(ValueError):
+            DailyRollup.record('archived', 'low')
+
+
+# ============================================
+# BACKFILL TESTS
+# ============================================
+
+class BackfillRollupsCommandTest(TestCase):
+    """Test cases for the backfill_rollups command"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.past = timezone.now() - timedelta(days=40)
+        old = Todo.objects.create(title='Old', priority='low', is_resolved=True)
+        Todo.objects.filter(pk=old.pk).update(created_at=self.past, updated_at=self.past)
+        Todo.objects.create(title='New', priority='low')
+        DailyRollup.objects.all().delete()
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('backfill_rollups', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_in_chunks(self):
+        """Test history is rebuilt chunk by chunk"""
+        output = self.run_command('--chunk-days', '7')
+        past_day = timezone.localdate(self.past)
+        rollup = rollup_for('low', past_day)
+        self.assertEqual(rollup.created, 1)
+        self.assertEqual(rollup.resolved, 1)
+        self.assertEqual(rollup_for('low').created, 1)
+        self.assertEqual(output.count('rollup rows\n'), 6)
+
+    def test_backfill_overdue_levels(self):
+        """Test each day counts the TODOs past due and not yet resolved by its end"""
+        past_day = timezone.localdate(self.past)
+        late = Todo.objects.create(title='Late', priority='high', due_date=past_day + timedelta(days=2))
+        resolved_at = self.past + timedelta(days=5)
+        Todo.objects.filter(pk=late.pk).update(created_at=self.past, is_resolved=True, updated_at=resolved_at)
+        Todo.objects.create(title='Still late', priority='high', due_date=self.today - timedelta(days=1))
+        DailyRollup.objects.all().delete()
+
+        self.run_command('--chunk-days', '3')
+        overdue = dict(DailyRollup.objects.filter(priority='high').values_list('day', 'overdue'))
+        self.assertEqual(overdue.get(past_day + timedelta(days=2), 0), 0)
+        self.assertEqual(overdue[past_day + timedelta(days=3)], 1)
+        self.assertEqual(overdue[past_day + timedelta(days=4)], 1)
+        self.assertEqual(overdue.get(past_day + timedelta(days=5), 0), 0)
+        self.assertEqual(overdue[self.today], 1)
+
+    def test_backfill_skips_existing_rows_unless_replacing(self):
+        """Test live rollups are preserved unless --replace is given"""
+        past_day = timezone.localdate(self.past)
+        DailyRollup.objects.create(day=past_day, priority='low', created=5, deleted=2)
+        self.run_command()
+        self.assertEqual(rollup_for('low', past_day).created, 5)
+        self.run_command('--replace')
+        rollup = rollup_for('low', past_day)
+        self.assertEqual(rollup.created, 1)
+        self.assertEqual(rollup.deleted, 2)
+
+
+# ============================================
+# DASHBOARD TESTS
+# ============================================
+
+class DashboardViewTest(TestCase):
+    """Test cases for the analytics dashboard"""
+
+    def setUp(self):
+        today = timezone.localdate()
+        DailyRollup.objects.create(day=today, priority='high', created=3, resolved=1)
+        DailyRollup.objects.create(day=today - timedelta(days=1), priority='low', created=2, deleted=1)
+        DailyRollup.objects.create(day=today - timedelta(days=100), priority='low', created=50)
+
+    def test_dashboard_reads_only_rollups(self):
+        """Test the dashboard is a single query over the rollup table"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('analytics-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['totals']['created'], 5)
+        self.assertEqual(response.context['totals']['deleted'], 1)
+        self.assertEqual(len(response.context['trend']), 30)
+
+    def test_dashboard_overdue_trend(self):
+        """Test overdue levels are charted per day and the latest one is reported"""
+        today = timezone.localdate()
+        DailyRollup.objects.filter(day=today).update(overdue=4)
+        DailyRollup.objects.create(day=today, priority='low', overdue=2)
+        DailyRollup.objects.filter(day=today - timedelta(days=1)).update(overdue=5)
+        response = self.client.get(reverse('analytics-dashboard'))
+        self.assertEqual(response.context['totals']['overdue'], 6)
+        self.assertEqual([row['overdue'] for row in response.context['trend'][-2:]], [5, 6])
+        self.assertEqual(
+            {row['priority']: row['overdue'] for row in response.context['per_priority']},
+            {'Low': 2, 'Medium': 0, 'High': 4},
+        )
+        self.assertContains(response, 'Overdue now: 6')
+
+    def test_dashboard_window(self):
+        """Test the days parameter widens the window"""
+        response = self.client.get(reverse('analytics-dashboard') + '?days=365')
+        self.assertEqual(response.context['totals']['created'], 55)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.views.generic import TemplateView
+from todos.models import Todo
+from .models import DailyRollup
+
+
+class DashboardView(TemplateView):
+    """Productivity trends, read only from the daily rollup table."""
+    template_name = 'analytics/dashboard.html'
+    default_days = 30
+    max_days = 366
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+        return max(1, min(days, self.max_days))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.get_days()
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+
+        empty = dict.fromkeys(DailyRollup.EVENTS, 0)
+        per_day = {start + timedelta(days=i): dict(empty, overdue=0) for i in range(days)}
+        per_priority = {value: dict(empty, overdue=0) for value, _ in Todo.PRIORITY_CHOICES}
+        totals = dict(empty)
+
+        for rollup in DailyRollup.objects.filter(day__gte=start, day__lte=end):
+            for event in DailyRollup.EVENTS:
+                count = getattr(rollup, event)
+                per_day[rollup.day][event] += count
+                per_priority.setdefault(rollup.priority, dict(empty, overdue=0))[event] += count
+                totals[event] += count
+            # Overdue is a level: sum it per day, and report the latest one per priority.
+            per_day[rollup.day]['overdue'] += rollup.overdue
+            if rollup.day == end:
+                per_priority[rollup.priority]['overdue'] = rollup.overdue
+        totals['overdue'] = per_day[end]['overdue']
+
+        peak = max([max(row[event] for event in DailyRollup.EVENTS) for row in per_day.values()] + [1])
+        overdue_peak = max([row['overdue'] for row in per_day.values()] + [1])
+        context.update({
+            'days': days,
+            'start': start,
+            'end': end,
+            'trend': [{'day': day, **row} for day, row in per_day.items()],
+            'per_priority': [
+                {'priority': label, **per_priority[value]} for value, label in Todo.PRIORITY_CHOICES
+            ],
+            'totals': totals,
+            'peak': peak,
+            'overdue_peak': overdue_peak,
+        })
+        return context
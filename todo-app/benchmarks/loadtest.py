@@ -0,0 +1,444 @@
+"""Concurrent mixed-workload load generator for the TODO app.
+
+Many simulated clients (one thread each, with their own cookie jar) issue a
+weighted mix of list/detail/create/toggle/delete requests against a server
+over real HTTP. The server is either run in this process (threaded WSGI), or
+launched locally as a subprocess (``runserver`` for WSGI, ``uvicorn`` for
+ASGI), or any already running instance given by URL.
+
+Database time, query counts and SQLite lock errors are read back from the
+``Server-Timing`` header emitted by ``benchmarks.middleware``.
+"""
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+OPERATIONS = ('list', 'detail', 'create', 'toggle', 'delete')
+# Deletes remove whatever TODOs the list page shows, so they are opt-in.
+DESTRUCTIVE_OPERATIONS = ('delete',)
+DEFAULT_MIX = {'list': 50, 'detail': 25, 'create': 15, 'toggle': 10}
+TARGETS = ('inprocess', 'wsgi', 'asgi', 'url')
+
+TODO_LINK_RE = re.compile(r'href="/todo/(\d+)/"')
+SERVER_TIMING_RE = re.compile(r'(\w+)(?:;dur=([\d.]+))?(?:;desc="?([^",]*)"?)?')
+
+
+def parse_mix(text):
+    """Parse ``"list=50,create=10"`` into an operation -> weight mapping."""
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation {name!r}; choose from {", ".join(OPERATIONS)}.')
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f'Weight for {name!r} must be an integer.') from None
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('The mix needs at least one operation with a positive weight.')
+    return mix
+
+
+def parse_server_timing(header):
+    """Extract ``(db_ms, queries, locked)`` from a ``Server-Timing`` header."""
+    db_ms, queries, locked = None, None, False
+    for match in SERVER_TIMING_RE.finditer(header or ''):
+        name, duration, description = match.groups()
+        if name == 'db' and duration:
+            db_ms = float(duration)
+        elif name == 'dbq' and description:
+            queries = int(description)
+        elif name == 'dblock':
+            locked = True
+    return db_ms, queries, locked
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Sample:
+    """Outcome of one request."""
+
+    __slots__ = ('operation', 'status', 'latency_ms', 'db_ms', 'queries', 'locked')
+
+    def __init__(self, operation, status, latency_ms, db_ms=None, queries=None, locked=False):
+        self.operation = operation
+        self.status = status
+        self.latency_ms = latency_ms
+        self.db_ms = db_ms
+        self.queries = queries
+        self.locked = locked
+
+    @property
+    def is_error(self):
+        return self.status == 0 or self.status >= 500
+
+
+def summarize(samples, elapsed):
+    """Aggregate samples into throughput, latency and error statistics."""
+
+    def stats(group):
+        latencies = sorted(s.latency_ms for s in group)
+        db_times = sorted(s.db_ms for s in group if s.db_ms is not None)
+        queries = [s.queries for s in group if s.queries is not None]
+        count = len(group)
+        errors = sum(s.is_error for s in group)
+        locks = sum(s.locked for s in group)
+        return {
+            'requests': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'client_errors': sum(400 <= s.status < 500 for s in group),
+            'lock_timeouts': locks,
+            'lock_timeout_rate': locks / count if count else 0.0,
+            'latency_ms': {
+                'mean': sum(latencies) / count if count else 0.0,
+                'p50': percentile(latencies, 50),
+                'p90': percentile(latencies, 90),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else 0.0,
+            },
+            'db_ms': {
+                'mean': sum(db_times) / len(db_times) if db_times else None,
+                'p95': percentile(db_times, 95) if db_times else None,
+                'total': sum(db_times) if db_times else None,
+            },
+            'queries_per_request': sum(queries) / len(queries) if queries else None,
+        }
+
+    summary = stats(samples)
+    summary['elapsed_s'] = elapsed
+    summary['throughput_rps'] = len(samples) / elapsed if elapsed else 0.0
+    summary['operations'] = {
+        op: stats([s for s in samples if s.operation == op])
+        for op in OPERATIONS
+        if any(s.operation == op for s in samples)
+    }
+    return summary
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses so each action costs exactly one request."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualClient:
+    """One simulated browser: its own cookies and CSRF token."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies),
+            _NoRedirect,
+        )
+
+    @property
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None, headers=None):
+        """Issue a request; returns ``(status, body, server_timing)``."""
+        url = self.base_url + path
+        headers = dict(headers or {})
+        body = None
+        if data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['X-CSRFToken'] = self.csrf_token
+            headers['Referer'] = url
+        req = urllib.request.Request(url, data=body, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.read(), response.headers.get('Server-Timing')
+        except urllib.error.HTTPError as exc:
+            with exc:
+                return exc.code, exc.read(), exc.headers.get('Server-Timing')
+        except (urllib.error.URLError, OSError):
+            return 0, b'', None
+
+
+class LoadTest:
+    """Run a weighted operation mix from ``workers`` concurrent clients."""
+
+    def __init__(self, base_url, workers=20, mix=None, duration=10.0, max_requests=None,
+                 timeout=30.0, seed=None, fragments=False):
+        self.base_url = base_url
+        self.fragments = fragments
+        self.workers = workers
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.duration = duration
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.samples = []
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._started = None
+        self._deadline = None
+
+    # ---- shared state -------------------------------------------------
+
+    def _remember_ids(self, body):
+        found = {int(pk) for pk in TODO_LINK_RE.findall(body.decode('utf-8', 'replace'))}
+        if found:
+            with self._lock:
+                self._ids |= found
+
+    def _pick_id(self, rng, remove=False):
+        with self._lock:
+            if not self._ids:
+                return None
+            pk = rng.choice(tuple(self._ids))
+            if remove:
+                self._ids.discard(pk)
+            return pk
+
+    def _claim_request(self):
+        with self._lock:
+            if self.max_requests is not None:
+                if self._issued >= self.max_requests:
+                    return False
+            elif time.monotonic() >= self._deadline:
+                return False
+            self._issued += 1
+            return True
+
+    def _start_clock(self):
+        """Barrier action: runs once, after every client has warmed up."""
+        self._started = time.monotonic()
+        self._deadline = self._started + self.duration
+
+    # ---- operations ---------------------------------------------------
+
+    def _run_operation(self, client, operation, rng):
+        data = None
+        if operation == 'list':
+            path = '/'
+        elif operation == 'create':
+            path = '/create/'
+            data = {
+                'title': f'Load test {rng.randrange(10 ** 9)}',
+                'priority': rng.choice(('low', 'medium', 'high')),
+                'description': 'Generated by manage.py loadtest',
+            }
+        else:
+            pk = self._pick_id(rng, remove=operation == 'delete')
+            if pk is None:
+                operation, path = 'list', '/'
+            elif operation == 'detail':
+                path = f'/todo/{pk}/'
+            elif operation == 'toggle':
+                path = f'/todo/{pk}/toggle/'
+                if self.fragments:
+                    data = {}
+            else:
+                path = f'/todo/{pk}/delete/'
+                data = {}
+
+        # Fragment mode: mutations get the card/counter JSON instead of a redirect.
+        headers = {'Accept': 'application/json'} if self.fragments and data is not None else None
+        start = time.perf_counter()
+        status, body, timing = client.request(path, data, headers)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if operation == 'list' and status == 200:
+            self._remember_ids(body)
+        return Sample(operation, status, latency_ms, *parse_server_timing(timing))
+
+    def _worker(self, rng, start_barrier):
+        client = VirtualClient(self.base_url, self.timeout)
+        # Pick up the CSRF cookie and an initial view of the TODO ids.
+        client.request('/create/')
+        status, body, _ = client.request('/')
+        if status == 200:
+            self._remember_ids(body)
+
+        operations = list(self.mix)
+        weights = [self.mix[op] for op in operations]
+        samples = []
+        start_barrier.wait()
+        while self._claim_request():
+            operation = rng.choices(operations, weights)[0]
+            samples.append(self._run_operation(client, operation, rng))
+        with self._lock:
+            self.samples.extend(samples)
+
+    def run(self):
+        """Run the load test and return its summary."""
+        start_barrier = threading.Barrier(self.workers, action=self._start_clock)
+        threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(random.Random(self.random.getrandbits(64)), start_barrier),
+                daemon=True,
+            )
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(self.samples, time.monotonic() - self._started)
+
+
+# ============================================
+# SERVERS
+# ============================================
+
+SERVER_TIMING_MIDDLEWARE = 'benchmarks.middleware.ServerTimingMiddleware'
+
+
+def free_port(host='127.0.0.1'):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class InProcessServer:
+    """Serve the project's WSGI application from a threaded server in this process.
+
+    The handler is built the same way ``todo_project/wsgi.py`` builds it,
+    with the Server-Timing middleware prepended.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def __enter__(self):
+        from django.conf import settings
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+        from django.test.utils import override_settings
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadedWSGIServer):
+            # Room for every simulated client to connect at once.
+            request_queue_size = 1024
+
+        middleware = list(settings.MIDDLEWARE)
+        if SERVER_TIMING_MIDDLEWARE not in middleware:
+            middleware.insert(0, SERVER_TIMING_MIDDLEWARE)
+        with override_settings(MIDDLEWARE=middleware):
+            application = WSGIHandler()
+
+        # Failed requests are already counted; keep their tracebacks off the report.
+        self.request_logger = logging.getLogger('django.request')
+        self.request_logger_disabled = self.request_logger.disabled
+        self.request_logger.disabled = True
+
+        self.httpd = Server((self.host, self.port), QuietHandler)
+        self.httpd.set_app(application)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return f'http://{self.host}:{self.httpd.server_address[1]}'
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+        self.request_logger.disabled = self.request_logger_disabled
+
+
+class SubprocessServer:
+    """Launch ``runserver`` (WSGI) or ``uvicorn`` (ASGI) locally for the run."""
+
+    def __init__(self, kind, base_dir, host='127.0.0.1', port=None, startup_timeout=30.0):
+        self.kind = kind
+        self.base_dir = base_dir
+        self.host = host
+        self.port = port or free_port(host)
+        self.startup_timeout = startup_timeout
+        self.process = None
+
+    def command(self):
+        if self.kind == 'wsgi':
+            return [sys.executable, 'manage.py', 'runserver', '--noreload', f'{self.host}:{self.port}']
+        return [
+            sys.executable, '-m', 'uvicorn', 'todo_project.asgi:application',
+            '--host', self.host, '--port', str(self.port), '--log-level', 'warning',
+        ]
+
+    def __enter__(self):
+        env = {**os.environ, 'TODO_SERVER_TIMING': '1'}
+        self.process = subprocess.Popen(
+            self.command(), cwd=self.base_dir, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.kind} server exited with code {self.process.returncode}.')
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    return f'http://{self.host}:{self.port}'
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f'{self.kind} server did not start within {self.startup_timeout:.0f}s.')
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+# ============================================
+# RESULTS
+# ============================================
+
+def record_result(path, label, config, summary):
+    """Append one run to a JSON-lines results file."""
+    entry = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'label': label,
+        'config': config,
+        'summary': summary,
+    }
+    with open(path, 'a', encoding='utf-8') as results:
+        results.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def load_results(path):
+    """Read every recorded run from a JSON-lines results file."""
+    try:
+        with open(path, encoding='utf-8') as results:
+            return [json.loads(line) for line in results if line.strip()]
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.sessions import MESSAGE_STORES, MUTATIONS, measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Count total and django_session queries per mutation (including the redirected '
+        'page) for every session store and message storage combination. Nothing is kept.'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            self.report()
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+    def report(self):
+        measure('db', 'session')  # warm-up: fills one-off caches such as content types
+        baseline = measure('db', 'session')
+        header = f"{'session store':<15} {'messages':<9}" + ''.join(f' {name:>14}' for name in MUTATIONS)
+        self.stdout.write('Queries per mutation round-trip as total/session (saved vs db+session):')
+        self.stdout.write(header)
+        for session_store in settings.SESSION_STORES:
+            for message_store in MESSAGE_STORES:
+                results = baseline if (session_store, message_store) == ('db', 'session') \
+                    else measure(session_store, message_store)
+                cells = ''.join(
+                    f" {f'{total}/{session} ({baseline[name][0] - total:+d})':>14}"
+                    for name, (total, session) in results.items()
+                )
+                marker = ' <- configured' if (
+                    session_store == settings.SESSION_STORE
+                    and settings.MESSAGE_STORAGE == MESSAGE_STORES[message_store]
+                ) else ''
+                self.stdout.write(f'{session_store:<15} {message_store:<9}{cells}{marker}')
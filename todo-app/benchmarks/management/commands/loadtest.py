@@ -0,0 +1,180 @@
+import importlib.util
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from benchmarks.loadtest import (
+    DEFAULT_MIX, DESTRUCTIVE_OPERATIONS, TARGETS, InProcessServer, LoadTest, SubprocessServer, load_results, parse_mix,
+    record_result,
+)
+from todos.models import Todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a concurrent mixed list/detail/create/toggle workload against the app '
+        'and report throughput, latency percentiles, error/lock-timeout rates and DB time. '
+        'The workload writes to the configured database; point it at a copy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=TARGETS, default='inprocess',
+            help='inprocess: threaded WSGI server in this process (default); wsgi: launch '
+                 'runserver; asgi: launch uvicorn on todo_project.asgi; url: use --url.',
+        )
+        parser.add_argument('--url', help='Base URL of an already running server (with --target url).')
+        parser.add_argument('--workers', type=int, default=20, help='Concurrent clients (default: 20).')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run (default: 10).')
+        parser.add_argument('--requests', type=int, help='Stop after this many requests instead of --duration.')
+        parser.add_argument(
+            '--mix', default=','.join(f'{op}={weight}' for op, weight in DEFAULT_MIX.items()),
+            help='Operation weights, e.g. "list=50,detail=25,create=10,toggle=10,delete=5". '
+                 'delete needs --allow-destructive.',
+        )
+        parser.add_argument(
+            '--allow-destructive', action='store_true',
+            help='Allow delete in --mix. Deletes any TODO the list page shows, not only seeded ones.',
+        )
+        parser.add_argument(
+            '--seed-todos', type=int, default=0,
+            help='Create this many TODOs in the configured database before the run.',
+        )
+        parser.add_argument(
+            '--fragments', action='store_true',
+            help='Request fragment (JSON card) responses for create/toggle/delete instead of redirects.',
+        )
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds.')
+        parser.add_argument('--random-seed', type=int, help='Seed for a reproducible operation sequence.')
+        parser.add_argument('--label', default='', help='Name for this run in the results file.')
+        parser.add_argument(
+            '--output', default=str(settings.BASE_DIR / 'loadtest-results.jsonl'),
+            help='JSON-lines file the run is appended to.',
+        )
+        parser.add_argument('--no-record', action='store_true', help='Do not append the run to --output.')
+        parser.add_argument('--compare', action='store_true', help='Print recorded runs side by side and exit.')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            self.print_comparison(load_results(options['output']))
+            return
+
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        destructive = sorted(op for op in DESTRUCTIVE_OPERATIONS if mix.get(op))
+        if destructive and not options['allow_destructive']:
+            raise CommandError(
+                f"{', '.join(destructive)} removes TODOs from {settings.DATABASES['default']['NAME']}; "
+                'pass --allow-destructive to run it anyway.'
+            )
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+        target = options['target']
+        if target == 'url' and not options['url']:
+            raise CommandError('--target url requires --url.')
+        if target == 'asgi' and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('--target asgi needs uvicorn installed (pip install uvicorn).')
+
+        if options['seed_todos']:
+            self.seed(options['seed_todos'])
+
+        if target == 'inprocess':
+            server = InProcessServer()
+        elif target in ('wsgi', 'asgi'):
+            server = SubprocessServer(target, settings.BASE_DIR)
+        else:
+            server = None
+
+        config = {
+            'target': target,
+            'workers': options['workers'],
+            'duration': options['duration'],
+            'requests': options['requests'],
+            'fragments': options['fragments'],
+            'mix': mix,
+            'database': settings.DATABASES['default']['ENGINE'],
+        }
+        self.stdout.write(
+            f"Running {options['workers']} clients against {target} "
+            f"({options['requests'] or str(options['duration']) + 's'})..."
+        )
+        try:
+            if server is None:
+                summary = self.run(options['url'], mix, options)
+            else:
+                with server as base_url:
+                    summary = self.run(base_url, mix, options)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        self.print_summary(summary)
+        if not options['no_record']:
+            record_result(options['output'], options['label'], config, summary)
+            self.stdout.write(f"Recorded in {options['output']}")
+
+    def run(self, base_url, mix, options):
+        return LoadTest(
+            base_url,
+            workers=options['workers'],
+            mix=mix,
+            duration=options['duration'],
+            max_requests=options['requests'],
+            timeout=options['timeout'],
+            seed=options['random_seed'],
+            fragments=options['fragments'],
+        ).run()
+
+    def seed(self, count):
+        priorities = [value for value, _ in Todo.PRIORITY_CHOICES]
+        with transaction.atomic():
+            for i in range(count):
+                Todo.objects.create(title=f'Seed TODO {i + 1}', priority=priorities[i % len(priorities)])
+        self.stdout.write(f'Seeded {count} TODOs.')
+
+    def format_row(self, name, stats):
+        latency = stats['latency_ms']
+        db_mean = stats['db_ms']['mean']
+        queries = stats['queries_per_request']
+        return (
+            f"{name:<8} {stats['requests']:>8} {latency['p50']:>8.1f} {latency['p95']:>8.1f} "
+            f"{latency['p99']:>8.1f} {latency['max']:>8.1f} {stats['error_rate']:>7.2%} "
+            f"{stats['lock_timeout_rate']:>7.2%} "
+            f"{'-' if db_mean is None else format(db_mean, '.2f'):>8} "
+            f"{'-' if queries is None else format(queries, '.1f'):>6}"
+        )
+
+    def print_summary(self, summary):
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'op':<8} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+            f"{'errors':>7} {'locked':>7} {'db ms':>8} {'q/req':>6}"
+        )
+        for operation, stats in summary['operations'].items():
+            self.stdout.write(self.format_row(operation, stats))
+        self.stdout.write(self.format_row('total', summary))
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['requests']} requests in {summary['elapsed_s']:.2f}s = "
+            f"{summary['throughput_rps']:.1f} req/s"
+        ))
+
+    def print_comparison(self, runs):
+        if not runs:
+            self.stdout.write('No recorded runs.')
+            return
+        self.stdout.write(
+            f"{'when':<20} {'label':<16} {'target':<9} {'workers':>7} {'req/s':>8} {'p95 ms':>8} "
+            f"{'errors':>7} {'locked':>7} {'db ms':>8}"
+        )
+        for run in runs:
+            summary, config = run['summary'], run['config']
+            db_mean = summary['db_ms']['mean']
+            self.stdout.write(
+                f"{run['timestamp'][:19]:<20} {run['label'][:16]:<16} {config['target']:<9} "
+                f"{config['workers']:>7} {summary['throughput_rps']:>8.1f} "
+                f"{summary['latency_ms']['p95']:>8.1f} {summary['error_rate']:>7.2%} "
+                f"{summary['lock_timeout_rate']:>7.2%} "
+                f"{'-' if db_mean is None else format(db_mean, '.2f'):>8}"
+            )
@@ -0,0 +1,32 @@
+from django.db import OperationalError, connection
+
+from todo_project.query_timer import QueryTimer
+
+
+class ServerTimingMiddleware:
+    """Report per-request database time in a ``Server-Timing`` header.
+
+    The load-test harness (``manage.py loadtest``) reads ``db`` (total query
+    time), ``dbq`` (query count) and ``dblock`` (a "database is locked"
+    error occurred) from this header. Enable it with the
+    ``TODO_SERVER_TIMING`` environment variable; it is never on by default.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        metrics = [f'db;dur={timer.duration * 1000:.3f}', f'dbq;desc="{timer.count}"']
+        if timer.locked or getattr(request, '_db_locked', False):
+            metrics.append('dblock')
+        response['Server-Timing'] = ', '.join(metrics)
+        return response
+
+    def process_exception(self, request, exception):
+        # Lock errors raised on COMMIT never pass through the execute wrapper.
+        if isinstance(exception, OperationalError) and 'locked' in str(exception):
+            request._db_locked = True
@@ -0,0 +1,75 @@
+"""Count the queries each mutation costs under different session/message stores.
+
+Each mutation is replayed through the Django test client as a logged-in
+staff user, following the redirect so the page that consumes the flash
+message is included, inside a transaction that is rolled back afterwards.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from todos.models import Todo
+
+MESSAGE_STORES = {
+    'cookie': 'django.contrib.messages.storage.cookie.CookieStorage',
+    'fallback': 'django.contrib.messages.storage.fallback.FallbackStorage',
+    'session': 'django.contrib.messages.storage.session.SessionStorage',
+}
+
+MUTATIONS = ('create', 'update', 'toggle', 'delete', 'admin-toggle')
+
+
+def _run_mutation(client, name, todo):
+    if name == 'create':
+        return client.post(reverse('todo-create'), {'title': 'Bench', 'priority': 'low'}, follow=True)
+    if name == 'update':
+        return client.post(
+            reverse('todo-update', args=[todo.pk]),
+            {'title': 'Bench updated', 'priority': 'high'},
+            follow=True,
+        )
+    if name == 'toggle':
+        return client.get(reverse('todo-toggle', args=[todo.pk]), follow=True)
+    if name == 'delete':
+        return client.post(reverse('todo-delete', args=[todo.pk]), follow=True)
+    # The admin changelist's list_editable form is the admin's "toggle".
+    return client.post(
+        reverse('admin:todos_todo_changelist'),
+        {
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '1',
+            'form-0-id': str(todo.pk),
+            'form-0-is_resolved': 'on',
+            '_save': 'Save',
+        },
+        follow=True,
+    )
+
+
+def measure(session_store, message_store):
+    """Return ``{mutation: (total_queries, session_queries)}`` for one configuration."""
+    results = {}
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        SESSION_ENGINE=settings.SESSION_STORES[session_store],
+        MESSAGE_STORAGE=MESSAGE_STORES[message_store],
+    ):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        with transaction.atomic():
+            user = get_user_model().objects.create_superuser('session-bench', 'bench@example.com', 'bench')
+            client = Client()
+            client.force_login(user)
+            for name in MUTATIONS:
+                todo = Todo.objects.create(title=f'Bench {name}')
+                with CaptureQueriesContext(connection) as queries:
+                    response = _run_mutation(client, name, todo)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+                session = sum('django_session' in query['sql'] for query in queries.captured_queries)
+                results[name] = (len(queries), session)
+            transaction.set_rollback(True)
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+    return results
@@ -0,0 +1,149 @@
+import json
+import os
+import runpy
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.http import HttpResponse
+from todos.models import Todo
+from .loadtest import DEFAULT_MIX, Sample, parse_mix, parse_server_timing, percentile, summarize
+from .middleware import ServerTimingMiddleware
+from .sessions import MESSAGE_STORES, MUTATIONS, measure
+
+
+# ============================================
+# HARNESS UNIT TESTS
+# ============================================
+
+class LoadTestHelpersTest(TestCase):
+    """Test cases for mix parsing, header parsing and statistics"""
+
+    def test_parse_mix(self):
+        """Test weights are parsed and unknown operations rejected"""
+        self.assertEqual(parse_mix('list=3, toggle=1'), {'list': 3, 'toggle': 1})
+        with self.assertRaises(ValueError):
+            parse_mix('list=3,archive=1')
+        with self.assertRaises(ValueError):
+            parse_mix('list=0')
+
+    def test_parse_server_timing(self):
+        """Test DB time, query count and lock flag are read from the header"""
+        self.assertEqual(parse_server_timing('db;dur=12.500, dbq;desc="4", dblock'), (12.5, 4, True))
+        self.assertEqual(parse_server_timing(None), (None, None, False))
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_summarize(self):
+        """Test throughput, error and lock rates per operation"""
+        samples = [
+            Sample('list', 200, 10.0, 2.0, 5),
+            Sample('list', 200, 30.0, 4.0, 5),
+            Sample('toggle', 500, 50.0, 1.0, 3, locked=True),
+            Sample('detail', 404, 5.0),
+        ]
+        summary = summarize(samples, 2.0)
+        self.assertEqual(summary['throughput_rps'], 2.0)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['client_errors'], 1)
+        self.assertEqual(summary['lock_timeout_rate'], 0.25)
+        self.assertEqual(summary['operations']['list']['db_ms']['mean'], 3.0)
+        self.assertEqual(summary['operations']['toggle']['lock_timeouts'], 1)
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """Test cases for the Server-Timing middleware"""
+
+    def test_header_reports_queries(self):
+        """Test query count and DB time are reported"""
+        def view(request):
+            list(Todo.objects.all())
+            return HttpResponse('ok')
+
+        response = ServerTimingMiddleware(view)(RequestFactory().get('/'))
+        db_ms, queries, locked = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(queries, 1)
+        self.assertGreaterEqual(db_ms, 0)
+        self.assertFalse(locked)
+
+
+# ============================================
+# END-TO-END TESTS
+# ============================================
+
+class LoadTestCommandTest(TransactionTestCase):
+    """Test cases for running the loadtest command in-process"""
+
+    def test_run_and_record(self):
+        """Test a short in-process run completes and is recorded"""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.jsonl')
+            out = StringIO()
+            call_command(
+                'loadtest', workers=4, requests=40, seed_todos=5, label='ci',
+                output=output, random_seed=1, stdout=out,
+            )
+            self.assertIn('40 requests', out.getvalue())
+            with open(output) as results:
+                run = json.loads(results.readline())
+            self.assertEqual(run['label'], 'ci')
+            self.assertEqual(run['summary']['requests'], 40)
+            self.assertIsNotNone(run['summary']['db_ms']['mean'])
+
+            out = StringIO()
+            call_command('loadtest', compare=True, output=output, stdout=out)
+            self.assertIn('ci', out.getvalue())
+
+    def test_delete_needs_explicit_opt_in(self):
+        """Test deletes are left out of the default mix and refused unless allowed"""
+        self.assertNotIn('delete', DEFAULT_MIX)
+        todo = Todo.objects.create(title='Keep me')
+        with self.assertRaisesMessage(CommandError, '--allow-destructive'):
+            call_command('loadtest', mix='list=1,delete=100', requests=10, no_record=True, stdout=StringIO())
+        self.assertTrue(Todo.objects.filter(pk=todo.pk).exists())
+
+        # The test runner only allows the 'testserver' host; the in-process server is 127.0.0.1.
+        with override_settings(ALLOWED_HOSTS=['127.0.0.1']):
+            call_command(
+                'loadtest', mix='list=1,delete=100', requests=10, workers=1, no_record=True,
+                allow_destructive=True, random_seed=1, stdout=StringIO(),
+            )
+        self.assertFalse(Todo.objects.filter(pk=todo.pk).exists())
+
+
+# ============================================
+# SESSION BENCHMARK TESTS
+# ============================================
+
+class SessionBenchmarkTest(TestCase):
+    """Test cases for session/message store query counts"""
+
+    def test_configured_stores_make_no_session_queries(self):
+        """Test the default signed-cookie sessions + cookie messages never hit django_session"""
+        path = Path(settings.BASE_DIR) / 'todo_project' / 'settings.py'
+        with mock.patch.dict(os.environ):
+            os.environ.pop('TODO_SESSION_STORE', None)
+            defaults = runpy.run_path(str(path))
+        self.assertEqual(defaults['SESSION_ENGINE'], 'django.contrib.sessions.backends.signed_cookies')
+        self.assertEqual(defaults['MESSAGE_STORAGE'], MESSAGE_STORES['cookie'])
+        for session_store in ('signed_cookies', 'cache'):
+            results = measure(session_store, 'cookie')
+            self.assertEqual(set(results), set(MUTATIONS))
+            for total, session in results.values():
+                self.assertEqual(session, 0)
+
+    def test_db_sessions_with_session_messages_hit_session_table(self):
+        """Test the database baseline does read and write django_session"""
+        results = measure('db', 'session')
+        self.assertGreater(results['create'][1], 0)
+        self.assertGreater(results['toggle'][1], 0)
+        self.assertFalse(Todo.objects.exists())
@@ -0,0 +1,49 @@
+"""The metrics this project exposes at ``/metrics``."""
+from .registry import Counter, Histogram, HitRatio
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+QUERY_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+http_requests = Counter(
+    'todo_http_requests_total',
+    'HTTP requests by URL name, method and status code.',
+    ['view', 'method', 'status'],
+)
+http_request_duration = Histogram(
+    'todo_http_request_duration_seconds',
+    'Time spent handling a request, by URL name and method.',
+    ['view', 'method'],
+)
+db_queries_per_request = Histogram(
+    'todo_db_queries_per_request',
+    'Number of SQL queries issued by one request, by URL name.',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = Histogram(
+    'todo_db_time_per_request_seconds',
+    'Total SQL execution time of one request, by URL name.',
+    ['view'],
+    buckets=QUERY_TIME_BUCKETS,
+)
+template_render_duration = Histogram(
+    'todo_template_render_seconds',
+    'Time spent rendering a top-level template, by template name.',
+    ['template'],
+    buckets=QUERY_TIME_BUCKETS,
+)
+
+todos_created = Counter('todo_todos_created_total', 'TODOs created.')
+todos_toggled = Counter('todo_todos_toggled_total', 'TODOs marked resolved or reopened.', ['state'])
+todos_deleted = Counter('todo_todos_deleted_total', 'TODOs deleted.')
+
+cache_requests = Counter(
+    'todo_cache_requests_total',
+    'Lookups in the app caches, by cache and result (hit or miss).',
+    ['cache', 'result'],
+)
+cache_hit_ratio = HitRatio(
+    'todo_cache_hit_ratio',
+    'Share of cache lookups that were hits since the process started.',
+    cache_requests,
+)
@@ -0,0 +1,36 @@
+import time
+
+from django.db import connection
+
+from todo_project.query_timer import QueryTimer
+
+from .instruments import db_queries_per_request, db_time_per_request, http_request_duration, http_requests
+from .registry import REGISTRY
+
+
+class MetricsMiddleware:
+    """Record latency, status and database work of every request, labelled by URL name.
+
+    Install it first in ``MIDDLEWARE`` so the latency covers the whole stack.
+    Requests that don't resolve to a named URL are labelled ``<unresolved>``
+    to keep the label set bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or '<unresolved>'
+        http_requests.inc(view, request.method, response.status_code)
+        http_request_duration.observe(elapsed, view, request.method)
+        db_queries_per_request.observe(timer.count, view)
+        db_time_per_request.observe(timer.duration, view)
+        REGISTRY.maybe_flush()
+        return response
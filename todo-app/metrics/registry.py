@@ -0,0 +1,331 @@
+"""Process-local metric aggregation and Prometheus text exposition.
+
+Every metric keeps one plain ``dict`` per thread. A thread only ever writes
+its own dict, so recording a sample takes no lock at all; a scrape sums the
+per-thread dicts (copying a ``dict`` is atomic under the GIL). When a thread
+exits, its dict is folded into a single "retired" dict, so thread-per-request
+servers don't accumulate one shard per request.
+
+Pre-forked WSGI workers each hold their own values. With
+``METRICS_MULTIPROCESS_DIR`` set, every process periodically writes a
+snapshot of its values to a file in that directory (at most once per
+``METRICS_FLUSH_INTERVAL`` seconds, after a request, and at exit) and a
+scrape served by any worker sums the snapshots of all of them. Files are
+never deleted by the app, so counters survive worker restarts; clear the
+directory when deploying.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value)
+    return str(value)
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+class _ShardOwner:
+    """Thread-local holder of a shard; its finalizer retires the shard."""
+    __slots__ = ('values', '__weakref__')
+
+    def __init__(self):
+        self.values = {}
+
+
+class Metric:
+    """Base class: per-thread value shards keyed by a tuple of label values."""
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        # Re-entrant: replacing ``_local`` in reset() retires the caller's shard.
+        self._shards_lock = threading.RLock()
+        (registry or REGISTRY).register(self)
+
+    def _values(self):
+        try:
+            return self._local.owner.values
+        except AttributeError:
+            owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards.append(owner.values)
+            # The thread-local owner is dropped when the thread exits.
+            weakref.finalize(owner, self._retire, owner.values)
+            self._local.owner = owner
+            return owner.values
+
+    def _retire(self, values):
+        """Fold the shard of an exited thread into the retired values."""
+        with self._shards_lock:
+            for position, shard in enumerate(self._shards):
+                if shard is values:
+                    del self._shards[position]
+                    break
+            else:
+                return  # dropped by reset() already
+            for key, value in values.items():
+                self._retired[key] = self.merge(self._retired[key], value) if key in self._retired else self.copy(value)
+
+    def _key(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {labelvalues!r}')
+        return tuple(str(value) for value in labelvalues)
+
+    def reset(self):
+        """Forget every recorded value (all threads)."""
+        with self._shards_lock:
+            self._shards = []
+            self._retired = {}
+            self._local = threading.local()
+
+    def snapshot(self):
+        """Values of this process summed across threads: ``{label values: value}``."""
+        # Copied under the lock so a shard being retired is counted exactly once.
+        with self._shards_lock:
+            shards = [dict(self._retired)] + [dict(shard) for shard in self._shards]
+        merged = {}
+        for shard in shards:
+            for key, value in shard.items():
+                merged[key] = self.merge(merged[key], value) if key in merged else self.copy(value)
+        return merged
+
+    @staticmethod
+    def copy(value):
+        return value
+
+    @staticmethod
+    def merge(left, right):
+        return left + right
+
+    def render(self, values):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+    type = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        values = self._values()
+        key = self._key(labelvalues)
+        values[key] = values.get(key, 0) + amount
+
+    def render(self, values):
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{format_labels(self.labelnames, key)} {format_value(value)}'
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum.
+
+    A value is stored as ``[count per bucket..., count above the last
+    bucket, sum]`` so that merging two values is an element-wise sum.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, *labelvalues):
+        values = self._values()
+        key = self._key(labelvalues)
+        counts = values.get(key)
+        if counts is None:
+            counts = values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @staticmethod
+    def copy(value):
+        return list(value)
+
+    @staticmethod
+    def merge(left, right):
+        return [a + b for a, b in zip(left, right)]
+
+    def render(self, values):
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = format_labels(self.labelnames, key, [('le', format_value(float(bound)))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {format_value(float(counts[-1]))}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class HitRatio:
+    """Gauge derived at scrape time from a hit/miss counter.
+
+    ``counter`` must have a ``result`` label (``hit`` or ``miss``); the ratio
+    is reported per value of its other labels.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, counter, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.counter = counter
+        position = counter.labelnames.index('result')
+        self.labelnames = counter.labelnames[:position] + counter.labelnames[position + 1:]
+        self._position = position
+        (registry or REGISTRY).register(self, derived=True)
+
+    def render(self, snapshot):
+        totals = {}
+        for key, value in snapshot.get(self.counter.name, {}).items():
+            group = key[:self._position] + key[self._position + 1:]
+            hits, lookups = totals.get(group, (0, 0))
+            totals[group] = (hits + (value if key[self._position] == 'hit' else 0), lookups + value)
+        for group, (hits, lookups) in sorted(totals.items()):
+            if lookups:
+                yield f'{self.name}{format_labels(self.labelnames, group)} {format_value(hits / lookups)}'
+
+
+class Registry:
+    """The set of metrics exposed by this process (and, in multi-process mode, its siblings)."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._derived = {}
+        self._last_flush = 0.0
+        self._started = time.time()
+
+    def register(self, metric, derived=False):
+        if metric.name in self._metrics or metric.name in self._derived:
+            raise ValueError(f'Metric {metric.name} is already registered.')
+        (self._derived if derived else self._metrics)[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name) or self._derived.get(name)
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+        self._last_flush = 0.0
+        self._started = time.time()
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # ----------------------------------------
+    # Multi-process mode
+    # ----------------------------------------
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        return Path(directory) if directory else None
+
+    def snapshot_path(self):
+        # The start time keeps a restarted worker that reuses a pid from
+        # overwriting the counts of its predecessor.
+        return self.directory / f'metrics-{os.getpid()}-{int(self._started * 1000)}.json'
+
+    def flush(self):
+        """Write this process's snapshot for sibling processes to read."""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in self.snapshot().items()
+        }
+        path = self.snapshot_path()
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """Flush if the last flush is older than ``METRICS_FLUSH_INTERVAL``."""
+        if self.directory is None:
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def collect(self):
+        """Snapshot of every process's values, merged per metric and label set."""
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        merged = {name: {} for name in self._metrics}
+        for path in sorted(self.directory.glob('metrics-*.json')):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # Being replaced right now, or removed; skip this round.
+            for name, items in data.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                values = merged[name]
+                for key, value in items:
+                    key = tuple(key)
+                    values[key] = metric.merge(values[key], value) if key in values else value
+        return merged
+
+    def exposition(self):
+        """Render every metric in the Prometheus text format."""
+        snapshot = self.collect()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.render(snapshot.get(name, {})))
+        for name, metric in sorted(self._derived.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.render(snapshot))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _flush_at_exit():
+    try:
+        REGISTRY.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
+# A forked worker must not report the values its parent recorded before the fork.
+os.register_at_fork(after_in_child=REGISTRY.reset)
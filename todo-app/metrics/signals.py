@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from todo_project.signals import cache_lookup
+from todos.models import Todo
+
+from .instruments import cache_requests, todos_created, todos_deleted, todos_toggled
+
+
+@receiver(post_save, sender=Todo)
+def count_todo_save(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(todos_created.inc)
+        return
+    previous = getattr(instance, '_persisted_values', None)
+    if previous is not None and previous['is_resolved'] != instance.is_resolved:
+        transaction.on_commit(partial(todos_toggled.inc, 'resolved' if instance.is_resolved else 'reopened'))
+
+
+@receiver(post_delete, sender=Todo)
+def count_todo_delete(sender, instance, **kwargs):
+    transaction.on_commit(todos_deleted.inc)
+
+
+@receiver(cache_lookup)
+def count_cache_lookup(sender, hit, **kwargs):
+    cache_requests.inc(sender, 'hit' if hit else 'miss')
@@ -0,0 +1,33 @@
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+from .instruments import template_render_duration
+
+
+class TimedTemplate:
+    """Wraps a backend template to time each ``render()`` call."""
+
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            template_render_duration.observe(time.perf_counter() - start, self._template.origin.template_name)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, reporting render time per top-level template.
+
+    Included templates (such as the TODO card) are counted in the time of
+    the template that includes them.
+    """
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,211 @@
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from todos.models import Todo
+from .registry import REGISTRY, Counter, Histogram, HitRatio, Registry
+
+
+def sample(text, name, **labels):
+    """Value of the sample ``name`` whose labels include ``labels``, or None."""
+    for line in text.splitlines():
+        match = re.match(r'^([a-z_]+)(?:\{(.*)\})? (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ''))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return None
+
+
+# ============================================
+# REGISTRY TESTS
+# ============================================
+
+class RegistryTest(SimpleTestCase):
+    """Test cases for metric aggregation and the text format"""
+
+    def setUp(self):
+        self.registry = Registry()
+        self.counter = Counter('requests_total', 'Requests.', ['path'], registry=self.registry)
+        self.histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0), registry=self.registry)
+
+    def test_exposition_format(self):
+        """Test counters and histograms render as Prometheus text"""
+        self.counter.inc('/a')
+        self.counter.inc('/a', amount=2)
+        self.counter.inc('say "hi"\n')
+        for value in (0.05, 0.1, 0.5, 3):
+            self.histogram.observe(value)
+        text = self.registry.exposition()
+
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{path="/a"} 3', text)
+        self.assertIn(r'requests_total{path="say \"hi\"\n"} 1', text)
+        self.assertIn('# TYPE latency_seconds histogram', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count 4', text)
+        self.assertEqual(sample(text, 'latency_seconds_sum'), 3.65)
+
+    def test_threads_aggregate_without_losing_updates(self):
+        """Test every thread writes its own shard and a scrape sums them"""
+        def work():
+            for _ in range(5000):
+                self.counter.inc('/t')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.counter.snapshot(), {('/t',): 40000})
+
+    def test_exited_threads_are_folded_into_one_shard(self):
+        """Test short-lived threads don't leave a shard each behind"""
+        def work():
+            self.counter.inc('/t')
+            self.histogram.observe(0.5)
+
+        for _ in range(300):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        self.assertLessEqual(len(self.counter._shards), 2)
+        self.assertLessEqual(len(self.histogram._shards), 2)
+        self.assertEqual(self.counter.snapshot(), {('/t',): 300})
+        self.assertEqual(self.histogram.snapshot()[()][-2:], [0, 150.0])
+
+    def test_label_arity_is_checked(self):
+        """Test recording with the wrong number of labels fails loudly"""
+        with self.assertRaises(ValueError):
+            self.counter.inc()
+
+    def test_hit_ratio(self):
+        """Test the derived ratio is computed per cache from hit/miss counts"""
+        lookups = Counter('lookups_total', 'Lookups.', ['cache', 'result'], registry=self.registry)
+        HitRatio('lookups_hit_ratio', 'Ratio.', lookups, registry=self.registry)
+        lookups.inc('a', 'hit', amount=3)
+        lookups.inc('a', 'miss')
+        lookups.inc('b', 'miss')
+        text = self.registry.exposition()
+        self.assertEqual(sample(text, 'lookups_hit_ratio', cache='a'), 0.75)
+        self.assertEqual(sample(text, 'lookups_hit_ratio', cache='b'), 0.0)
+
+    def test_multiprocess_mode_sums_every_worker(self):
+        """Test a scrape merges the snapshots written by sibling processes"""
+        other = Registry()
+        other._started = self.registry._started + 1  # a second worker
+        other_counter = Counter('requests_total', 'Requests.', ['path'], registry=other)
+        other_histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0), registry=other)
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            self.counter.inc('/a')
+            self.histogram.observe(0.5)
+            other_counter.inc('/a', amount=4)
+            other_counter.inc('/b')
+            other_histogram.observe(0.05)
+            other.flush()
+
+            text = self.registry.exposition()
+        self.assertEqual(sample(text, 'requests_total', path='/a'), 5)
+        self.assertEqual(sample(text, 'requests_total', path='/b'), 1)
+        self.assertEqual(sample(text, 'latency_seconds_bucket', le='0.1'), 1)
+        self.assertEqual(sample(text, 'latency_seconds_count'), 2)
+
+    def test_flush_is_throttled(self):
+        """Test workers write their snapshot at most once per flush interval"""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_MULTIPROCESS_DIR=directory, METRICS_FLUSH_INTERVAL=60):
+            self.registry.maybe_flush()
+            path = self.registry.snapshot_path()
+            written = path.stat().st_mtime_ns
+            self.counter.inc('/a')
+            self.registry.maybe_flush()
+            self.assertEqual(path.stat().st_mtime_ns, written)
+
+
+# ============================================
+# INSTRUMENTATION TESTS
+# ============================================
+
+class MetricsEndpointTest(TestCase):
+    """Test cases for the /metrics endpoint and the app instrumentation"""
+
+    def setUp(self):
+        REGISTRY.reset()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_request_metrics_per_url_name(self):
+        """Test latency, status and database work are labelled by URL name"""
+        Todo.objects.create(title='Listed')
+        self.client.get(reverse('todo-list'))
+        self.client.get(reverse('todo-list'))
+        self.client.get('/no-such-page/')
+        text = self.scrape()
+
+        self.assertEqual(sample(text, 'todo_http_requests_total', view='todo-list', method='GET', status=200), 2)
+        self.assertEqual(sample(text, 'todo_http_request_duration_seconds_count', view='todo-list'), 2)
+        self.assertEqual(sample(text, 'todo_http_requests_total', view='<unresolved>', status=404), 1)
+        self.assertEqual(sample(text, 'todo_db_queries_per_request_count', view='todo-list'), 2)
+        self.assertEqual(sample(text, 'todo_db_queries_per_request_bucket', view='todo-list', le='0.0'), 0)
+        self.assertGreater(sample(text, 'todo_db_time_per_request_seconds_sum', view='todo-list'), 0)
+        self.assertEqual(sample(text, 'todo_template_render_seconds_count', template='todos/todo_list.html'), 2)
+
+    def test_admin_views_are_labelled(self):
+        """Test admin pages report their namespaced URL names"""
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        self.client.get(reverse('admin:todos_todo_changelist'))
+        text = self.scrape()
+        self.assertEqual(
+            sample(text, 'todo_http_requests_total', view='admin:todos_todo_changelist', status=200), 1
+        )
+
+    def test_mutation_counters(self):
+        """Test creates, toggles and deletes are counted once committed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('todo-create'), {'title': 'Counted', 'priority': 'low'})
+        todo = Todo.objects.get(title='Counted')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('todo-toggle', args=[todo.pk]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('todo-toggle', args=[todo.pk]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('todo-delete', args=[todo.pk]))
+        text = self.scrape()
+
+        self.assertEqual(sample(text, 'todo_todos_created_total'), 1)
+        self.assertEqual(sample(text, 'todo_todos_toggled_total', state='resolved'), 1)
+        self.assertEqual(sample(text, 'todo_todos_toggled_total', state='reopened'), 1)
+        self.assertEqual(sample(text, 'todo_todos_deleted_total'), 1)
+
+    def test_cache_hit_ratios(self):
+        """Test the calendar cache reports hits and misses"""
+        self.client.get(reverse('todo-calendar'))
+        self.client.get(reverse('todo-calendar'))
+        text = self.scrape()
+        self.assertEqual(sample(text, 'todo_cache_requests_total', cache='calendar', result='miss'), 1)
+        self.assertEqual(sample(text, 'todo_cache_requests_total', cache='calendar', result='hit'), 1)
+        self.assertEqual(sample(text, 'todo_cache_hit_ratio', cache='calendar'), 0.5)
+
+    @override_settings(SESSION_ENGINE=settings.SESSION_STORES['cache'])
+    def test_session_cache_hits(self):
+        """Test the cache session store reports hits when it is selected"""
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        self.client.get(reverse('admin:index'))
+        text = self.scrape()
+        self.assertGreaterEqual(sample(text, 'todo_cache_requests_total', cache='sessions', result='hit'), 1)
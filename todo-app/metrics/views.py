@@ -0,0 +1,10 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from .registry import CONTENT_TYPE, REGISTRY
+
+
+@require_http_methods(['GET'])
+def metrics_view(request):
+    """Expose every metric in the Prometheus text format."""
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
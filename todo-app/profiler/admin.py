@@ -0,0 +1,64 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+OUTPUT_KINDS = ('pstats', 'collapsed')
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Read-only admin interface for browsing recent request profiles."""
+    list_display = ['created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'query_count', 'mode', 'user']
+    list_filter = ['mode', 'view_name']
+    search_fields = ['path', 'view_name']
+    fields = [
+        'created_at', 'user', 'mode', 'method', 'path', 'view_name', 'status_code',
+        'duration_ms', 'query_count', 'query_ms', 'downloads', 'top_functions_display', 'sql_display',
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download_view),
+                name='profiler_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk, kind):
+        """Serve a profile's pstats or collapsed-stack file."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = self.get_object(request, pk)
+        if profile is None or kind not in OUTPUT_KINDS or not profile.file_path(kind).exists():
+            raise Http404('No such profile output')
+        output = profile.file_path(kind)
+        return FileResponse(output.open('rb'), as_attachment=True, filename=output.name)
+
+    @admin.display(description='Output')
+    def downloads(self, obj):
+        kinds = [kind for kind in OUTPUT_KINDS if obj.file_path(kind).exists()]
+        return format_html_join(
+            ' · ', '<a href="{}">{}</a>',
+            ((reverse('admin:profiler_requestprofile_download', args=[obj.pk, kind]), f'{obj.stem}.{kind}') for kind in kinds),
+        ) or '—'
+
+    @admin.display(description='Top functions')
+    def top_functions_display(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.top_functions)
+
+    @admin.display(description='SQL log')
+    def sql_display(self, obj):
+        lines = '\n'.join(f"{query['ms']:9.3f} ms  {query['sql']}" for query in obj.sql_log)
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', lines)
@@ -0,0 +1,123 @@
+import cProfile
+import io
+import pstats
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import RequestProfile
+from .profiling import QueryLog, Sampler, collapse_pstats
+
+MODES = {'1': 'cprofile', 'true': 'cprofile', 'cprofile': 'cprofile', 'sample': 'sample'}
+
+
+class ProfilerMiddleware:
+    """Profile a single request on demand and keep the results for the admin.
+
+    Staff users opt in per request with ``?profile=1`` (or ``cprofile``) for
+    the deterministic profiler, ``?profile=sample`` for the sampling one, or
+    the same values in an ``X-Profile`` header. At most
+    ``PROFILER_RATE_LIMIT`` requests are profiled per window; others get an
+    ``X-Profile-Skipped`` header. The pstats and collapsed-stack files land
+    in ``PROFILER_DIR`` and the newest ``PROFILER_KEEP`` profiles are kept.
+
+    Install it after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        if not self.acquire_slot():
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = 'rate-limited'
+            return response
+        return self.profile(request, mode)
+
+    def requested_mode(self, request):
+        if not settings.PROFILER_ENABLED:
+            return None
+        value = request.headers.get('X-Profile') or request.GET.get('profile')
+        mode = MODES.get((value or '').lower())
+        if mode is None or not (request.user.is_authenticated and request.user.is_staff):
+            return None
+        return mode
+
+    def acquire_slot(self):
+        """Fixed-window rate limit shared through the default cache."""
+        limit, period = settings.PROFILER_RATE_LIMIT
+        key = f'profiler:window:{int(time.time() // period)}'
+        cache.add(key, 0, period)
+        try:
+            used = cache.incr(key)
+        except ValueError:  # evicted between add() and incr()
+            used = 1
+        return used <= limit
+
+    def profile(self, request, mode):
+        stem = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+        directory = Path(settings.PROFILER_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        log = QueryLog()
+
+        start = time.perf_counter()
+        with log.recording():
+            if mode == 'cprofile':
+                profiler = cProfile.Profile()
+                response = profiler.runcall(self.get_response, request)
+            else:
+                sampler = Sampler(settings.PROFILER_SAMPLE_INTERVAL)
+                sampler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    sampler.stop()
+        elapsed = time.perf_counter() - start
+
+        if mode == 'cprofile':
+            profiler.dump_stats(directory / f'{stem}.pstats')
+            summary = io.StringIO()
+            stats = pstats.Stats(profiler, stream=summary)
+            collapsed = collapse_pstats(stats)
+            stats.sort_stats('cumulative').print_stats(40)
+            top_functions = summary.getvalue()
+        else:
+            collapsed = sampler.collapsed()
+            leaves = Counter()
+            for stack, count in sampler.stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            top_functions = ''.join(f'{count:8d}  {frame}\n' for frame, count in leaves.most_common(40))
+        (directory / f'{stem}.collapsed').write_text(collapsed)
+
+        match = getattr(request, 'resolver_match', None)
+        record = RequestProfile.objects.create(
+            user=request.user,
+            mode=mode,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=(match.view_name if match else '') or '',
+            status_code=response.status_code,
+            duration_ms=elapsed * 1000,
+            query_count=len(log.queries),
+            query_ms=log.total_ms,
+            stem=stem,
+            top_functions=top_functions,
+            sql_log=log.queries,
+        )
+        self.prune()
+        response['X-Profile-Id'] = str(record.pk)
+        return response
+
+    def prune(self):
+        """Delete profiles (and, through a signal, their files) beyond ``PROFILER_KEEP``."""
+        stale = list(RequestProfile.objects.values_list('pk', flat=True)[settings.PROFILER_KEEP:])
+        if stale:
+            RequestProfile.objects.filter(pk__in=stale).delete()
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('mode', models.CharField(choices=[('cprofile', 'Deterministic (cProfile)'), ('sample', 'Sampling')], max_length=10)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField(help_text='Wall time of the profiled request')),
+                ('query_count', models.PositiveIntegerField()),
+                ('query_ms', models.FloatField(help_text='Total SQL execution time')),
+                ('stem', models.CharField(help_text='File name stem in PROFILER_DIR', max_length=100, unique=True)),
+                ('top_functions', models.TextField(blank=True, help_text='pstats summary by cumulative time')),
+                ('sql_log', models.JSONField(default=list, help_text='Every query of the request with its duration')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
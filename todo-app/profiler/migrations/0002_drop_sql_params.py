@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:00
+
+from django.db import migrations
+
+
+def drop_sql_params(apps, schema_editor):
+    """Remove the bound parameter values stored with earlier profiles."""
+    RequestProfile = apps.get_model('profiler', 'RequestProfile')
+    for profile in RequestProfile.objects.only('sql_log').iterator():
+        if any('params' in query for query in profile.sql_log):
+            for query in profile.sql_log:
+                query.pop('params', None)
+            profile.save(update_fields=['sql_log'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sql_params, migrations.RunPython.noop),
+    ]
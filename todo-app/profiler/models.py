@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Model recording one profiled request and where its output files are."""
+
+    MODE_CHOICES = [
+        ('cprofile', 'Deterministic (cProfile)'),
+        ('sample', 'Sampling'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField(help_text='Wall time of the profiled request')
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField(help_text='Total SQL execution time')
+    stem = models.CharField(max_length=100, unique=True, help_text='File name stem in PROFILER_DIR')
+    top_functions = models.TextField(blank=True, help_text='pstats summary by cumulative time')
+    sql_log = models.JSONField(default=list, help_text='Every query of the request with its duration')
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
+
+    def file_path(self, kind):
+        """Path of the ``pstats`` or ``collapsed`` output file."""
+        return Path(settings.PROFILER_DIR) / f'{self.stem}.{kind}'
+
+    @property
+    def has_pstats(self):
+        return self.file_path('pstats').exists()
@@ -0,0 +1,146 @@
+"""Profilers and output formats for ``ProfilerMiddleware``.
+
+Two modes are supported: ``cprofile`` wraps the request in the
+deterministic profiler and keeps its pstats, and ``sample`` polls the
+request thread's stack from a helper thread, which adds far less overhead
+to ORM-heavy requests but only yields stack counts.
+
+Both produce "collapsed stack" text (``frame;frame;frame value`` per line)
+that ``flamegraph.pl``, speedscope or inferno render as a flame graph.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+
+def short_filename(filename):
+    """Project files relative to ``BASE_DIR``, libraries from their package down."""
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        return filename[len(base):]
+    marker = 'site-packages' + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def frame_label(filename, lineno, name):
+    if filename == '~':  # built-in functions in pstats
+        return name.replace(';', ':')
+    return f'{name} ({short_filename(filename)}:{lineno})'.replace(';', ':')
+
+
+# ----------------------------------------
+# Deterministic profiles
+# ----------------------------------------
+
+def collapse_pstats(stats, max_depth=100, min_seconds=1e-5):
+    """Collapsed stacks from a ``pstats.Stats`` call graph, in microseconds.
+
+    cProfile only records caller -> callee edges, not whole stacks, so each
+    function's own time is split across the paths reaching it in proportion
+    to the cumulative time of each incoming edge (the approach used by
+    ``flameprof`` and ``gprof2dot``). Recursive cycles are cut, and paths
+    carrying less than ``min_seconds`` are dropped to bound the walk.
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, edge_cumulative))
+    roots = [func for func, (_, _, _, _, callers) in stats.stats.items() if not callers]
+
+    lines = Counter()
+
+    def walk(func, share, stack):
+        if share < min_seconds:
+            return
+        _, _, own, cumulative, _ = stats.stats[func]
+        stack = stack + [frame_label(*func)]
+        fraction = share / cumulative if cumulative else 0
+        micros = round(own * fraction * 1e6)
+        if micros:
+            lines[';'.join(stack)] += micros
+        if len(stack) >= max_depth:
+            return
+        for child, edge_cumulative in children.get(func, ()):
+            if frame_label(*child) in stack:
+                continue
+            walk(child, edge_cumulative * fraction, stack)
+
+    for root in roots:
+        walk(root, stats.stats[root][3], [])
+    return ''.join(f'{stack} {value}\n' for stack, value in sorted(lines.items()))
+
+
+# ----------------------------------------
+# Sampling profiles
+# ----------------------------------------
+
+class Sampler:
+    """Counts the stacks of one thread, sampled every ``interval`` seconds."""
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+
+# ----------------------------------------
+# SQL log
+# ----------------------------------------
+
+class QueryLog:
+    """``connection.execute_wrapper`` keeping every statement and its duration.
+
+    Bound parameter values are not kept: they carry user data (titles,
+    descriptions, session keys) into a table every staff user can browse.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'many': many,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+    @property
+    def total_ms(self):
+        return sum(query['ms'] for query in self.queries)
+
+    def recording(self):
+        return connection.execute_wrapper(self)
@@ -0,0 +1,193 @@
+import cProfile
+import os
+import pstats
+import runpy
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings as django_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from todos.models import Todo
+from .models import RequestProfile
+from .profiling import collapse_pstats
+
+
+def _leaf():
+    return sum(range(20000))
+
+
+def _branch():
+    return _leaf() + _leaf()
+
+
+# ============================================
+# OUTPUT FORMAT TESTS
+# ============================================
+
+class CollapsePstatsTest(SimpleTestCase):
+    """Test cases for turning a cProfile call graph into collapsed stacks"""
+
+    def test_stacks_follow_call_edges(self):
+        """Test leaf time is reported under the full path that reached it"""
+        profiler = cProfile.Profile()
+        profiler.runcall(_branch)
+        collapsed = collapse_pstats(pstats.Stats(profiler), min_seconds=0)
+
+        lines = collapsed.splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, value = line.rsplit(' ', 1)
+            self.assertGreater(int(value), 0)
+        leaf_stacks = [line.rsplit(' ', 1)[0] for line in lines if '_leaf' in line.rsplit(';', 1)[-1]]
+        self.assertEqual(len(leaf_stacks), 1)
+        frames = leaf_stacks[0].split(';')
+        self.assertIn('_branch (profiler/tests.py', frames[-2])
+        self.assertTrue(frames[-1].startswith('_leaf (profiler/tests.py:'))
+
+
+# ============================================
+# MIDDLEWARE TESTS
+# ============================================
+
+class ProfilerMiddlewareTest(TestCase):
+    """Test cases for on-demand request profiling"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(
+            PROFILER_ENABLED=True, PROFILER_DIR=self.directory, PROFILER_RATE_LIMIT=(10, 60), PROFILER_KEEP=50,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        Todo.objects.create(title='Profiled')
+        self.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.login(username='staff', password='password')
+
+    def test_staff_cprofile(self):
+        """Test a deterministic profile stores pstats, collapsed stacks and SQL"""
+        response = self.client.get(reverse('todo-list'), {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+        self.assertEqual(profile.mode, 'cprofile')
+        self.assertEqual(profile.view_name, 'todo-list')
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile.query_count, len(profile.sql_log))
+        self.assertTrue(any('todos_todo' in query['sql'] for query in profile.sql_log))
+        self.assertFalse(any('params' in query for query in profile.sql_log))
+        self.assertIn('cumulative', profile.top_functions)
+        self.assertTrue(profile.has_pstats)
+        pstats.Stats(str(profile.file_path('pstats')))  # loadable
+        self.assertIn('todos/views.py', profile.file_path('collapsed').read_text())
+
+    def test_sampling_mode_by_header(self):
+        """Test the sampling profiler is selected through the X-Profile header"""
+        response = self.client.get(reverse('todo-list'), headers={'X-Profile': 'sample'})
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.mode, 'sample')
+        self.assertFalse(profile.has_pstats)
+        self.assertTrue(profile.file_path('collapsed').exists())
+
+    def test_ignored_without_staff_or_trigger(self):
+        """Test anonymous, non-staff and untriggered requests are not profiled"""
+        self.client.get(reverse('todo-list'))
+        self.client.logout()
+        self.client.get(reverse('todo-list'), {'profile': '1'})
+        User.objects.create_user('user', password='password')
+        self.client.login(username='user', password='password')
+        response = self.client.get(reverse('todo-list'), {'profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled(self):
+        """Test the profiler can be switched off in settings"""
+        self.client.get(reverse('todo-list'), {'profile': '1'})
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_disabled_by_default(self):
+        """Test the profiler stays off unless TODO_PROFILER=1 is set"""
+        path = Path(django_settings.BASE_DIR) / 'todo_project' / 'settings.py'
+        with mock.patch.dict(os.environ):
+            os.environ.pop('TODO_PROFILER', None)
+            self.assertFalse(runpy.run_path(str(path))['PROFILER_ENABLED'])
+            os.environ['TODO_PROFILER'] = '1'
+            self.assertTrue(runpy.run_path(str(path))['PROFILER_ENABLED'])
+
+    @override_settings(PROFILER_RATE_LIMIT=(2, 60))
+    def test_rate_limit(self):
+        """Test requests beyond the rate limit are served without profiling"""
+        for _ in range(2):
+            self.assertIn('X-Profile-Id', self.client.get(reverse('todo-list'), {'profile': '1'}))
+        response = self.client.get(reverse('todo-list'), {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Profile-Skipped'], 'rate-limited')
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+    @override_settings(PROFILER_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        """Test only the newest profiles and their files are kept"""
+        ids = [self.client.get(reverse('todo-list'), {'profile': '1'})['X-Profile-Id'] for _ in range(3)]
+        kept = list(RequestProfile.objects.values_list('pk', flat=True))
+        self.assertCountEqual(kept, [int(pk) for pk in ids[1:]])
+        self.assertEqual(len(list(self.directory.glob('*.pstats'))), 2)
+        self.assertEqual(len(list(self.directory.glob('*.collapsed'))), 2)
+
+
+# ============================================
+# ADMIN TESTS
+# ============================================
+
+class RequestProfileAdminTest(TestCase):
+    """Test cases for browsing and downloading profiles in the admin"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILER_ENABLED=True, PROFILER_DIR=Path(directory.name))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('todo-list'), {'profile': '1'})
+        self.profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+
+    def test_changelist_and_detail(self):
+        """Test recent profiles are listed and shown read-only with their SQL"""
+        response = self.client.get(reverse('admin:profiler_requestprofile_changelist'))
+        self.assertContains(response, 'todo-list')
+        response = self.client.get(reverse('admin:profiler_requestprofile_change', args=[self.profile.pk]))
+        self.assertContains(response, 'todos_todo')
+        self.assertContains(response, f'{self.profile.stem}.pstats')
+        self.assertNotContains(response, 'name="_save"')
+
+    def test_download(self):
+        """Test the profile output files can be downloaded"""
+        for kind in ('pstats', 'collapsed'):
+            response = self.client.get(reverse('admin:profiler_requestprofile_download', args=[self.profile.pk, kind]))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(f'{self.profile.stem}.{kind}', response['Content-Disposition'])
+            b''.join(response.streaming_content)
+            response.close()
+        response = self.client.get(reverse('admin:profiler_requestprofile_download', args=[self.profile.pk, 'txt']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleting_removes_files(self):
+        """Test deleting a profile deletes its output files"""
+        path = self.profile.file_path('pstats')
+        self.profile.delete()
+        self.assertFalse(path.exists())
@@ -0,0 +1,51 @@
+// Title suggestions for inputs with a data-autocomplete-url attribute.
+//
+// While the user types, the server's in-memory title index is asked for
+// active TODOs starting with the text so far, and the matches are offered
+// through a <datalist>, which makes existing (possibly duplicate) TODOs
+// visible before a new one is created.
+(function () {
+    'use strict';
+
+    if (!window.fetch) {
+        return;
+    }
+
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(function (input, index) {
+        const datalist = document.createElement('datalist');
+        datalist.id = 'title-suggestions-' + index;
+        input.after(datalist);
+        input.setAttribute('list', datalist.id);
+
+        let timer = null;
+        let latest = '';
+
+        function show(data) {
+            if (data.query !== latest) {
+                return;  // a newer keystroke is already in flight
+            }
+            datalist.replaceChildren.apply(datalist, data.results.map(function (result) {
+                const option = document.createElement('option');
+                option.value = result.title;
+                option.label = result.priority;
+                return option;
+            }));
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            latest = input.value;
+            if (!latest.trim()) {
+                datalist.replaceChildren();
+                return;
+            }
+            timer = setTimeout(function () {
+                const url = input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(latest);
+                fetch(url, {headers: {'Accept': 'application/json'}, credentials: 'same-origin'})
+                    .then(function (response) { return response.json(); })
+                    .then(show)
+                    .catch(function () {});
+            }, 80);
+        });
+    });
+})();
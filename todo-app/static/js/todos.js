@@ -0,0 +1,175 @@
+// Progressive enhancement for the TODO list page.
+//
+// Toggle, delete and quick-add ask the server for a fragment response
+// (Accept: application/json) and patch the single affected card and the
+// counters in place, instead of following the redirect to a full re-render
+// of the list. Any failure falls back to the normal full-page flow.
+//
+// In the manual sort mode cards can be dragged; a drop sends the ids of the
+// new neighbours and the server writes a rank key for the moved card only.
+(function () {
+    'use strict';
+
+    const list = document.querySelector('[data-todo-list]');
+    if (!list || !window.fetch) {
+        return;
+    }
+    const filter = list.dataset.filter || 'all';
+    const manual = list.dataset.sort === 'manual';
+
+    // The server hides a changed card that no longer matches these filters.
+    const pageQuery = new URLSearchParams(window.location.search);
+    const query = new URLSearchParams({filter: filter});
+    pageQuery.getAll('tag').forEach(function (tag) {
+        query.append('tag', tag);
+    });
+    if (pageQuery.get('match')) {
+        query.set('match', pageQuery.get('match'));
+    }
+
+    function csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function send(url, body) {
+        return fetch(url + '?' + query.toString(), {
+            method: 'POST',
+            body: body || new FormData(),
+            credentials: 'same-origin',
+            headers: {
+                'Accept': 'application/json',
+                'X-CSRFToken': csrfToken(),
+            },
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    function flash(message) {
+        const container = list.querySelector('[data-fragment-messages]');
+        if (!container || !message) {
+            return;
+        }
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-success';
+        alert.textContent = message;
+        container.replaceChildren(alert);
+    }
+
+    function apply(data) {
+        const card = document.getElementById(data.replaces || 'todo-' + data.id);
+        const grid = list.querySelector('[data-todo-grid]');
+        if (data.removed) {
+            if (card) {
+                card.remove();
+            }
+        } else if (card) {
+            card.outerHTML = data.html;
+        } else if (grid) {
+            grid.insertAdjacentHTML('afterbegin', data.html);
+        } else {
+            // The empty state has no grid to insert into.
+            window.location.reload();
+            return;
+        }
+        enableDragging();
+        Object.keys(data.counts).forEach(function (name) {
+            const counter = list.querySelector('[data-count="' + name + '"]');
+            if (counter) {
+                counter.textContent = data.counts[name];
+            }
+        });
+        flash(data.message);
+    }
+
+    function todoId(card) {
+        const match = card && card.id.match(/^todo-(\d+)$/);
+        return match ? match[1] : '';
+    }
+
+    function enableDragging() {
+        if (!manual) {
+            return;
+        }
+        list.querySelectorAll('[data-todo-grid] .todo-card').forEach(function (card) {
+            card.draggable = Boolean(todoId(card));
+        });
+    }
+
+    let dragged = null;
+    let originalNext = null;
+
+    list.addEventListener('dragstart', function (event) {
+        dragged = event.target.closest && event.target.closest('.todo-card[draggable="true"]');
+        if (dragged) {
+            originalNext = dragged.nextElementSibling;
+            dragged.classList.add('dragging');
+            event.dataTransfer.effectAllowed = 'move';
+        }
+    });
+
+    list.addEventListener('dragover', function (event) {
+        const target = event.target.closest('.todo-card');
+        if (!dragged || !target || target === dragged) {
+            return;
+        }
+        event.preventDefault();
+        const rect = target.getBoundingClientRect();
+        const after = event.clientY > rect.bottom - rect.height / 2
+            || (event.clientY >= rect.top && event.clientX > rect.left + rect.width / 2);
+        target.insertAdjacentElement(after ? 'afterend' : 'beforebegin', dragged);
+    });
+
+    list.addEventListener('dragend', function () {
+        if (!dragged) {
+            return;
+        }
+        const card = dragged;
+        dragged = null;
+        card.classList.remove('dragging');
+        if (card.nextElementSibling === originalNext) {
+            return;
+        }
+        const grid = list.querySelector('[data-todo-grid]');
+        const body = new FormData();
+        body.append('before', todoId(card.previousElementSibling));
+        body.append('after', todoId(card.nextElementSibling));
+        send(grid.dataset.moveUrl.replace('/0/', '/' + todoId(card) + '/'), body).catch(function () {
+            window.location.reload();
+        });
+    });
+
+    enableDragging();
+
+    list.addEventListener('click', function (event) {
+        const link = event.target.closest('[data-fragment-action]');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        if (link.dataset.fragmentAction === 'delete' && !window.confirm('Delete this TODO? This cannot be undone.')) {
+            return;
+        }
+        send(link.pathname).then(apply).catch(function () {
+            window.location.href = link.href;
+        });
+    });
+
+    list.addEventListener('submit', function (event) {
+        const form = event.target.closest('[data-fragment-form]');
+        if (!form) {
+            return;
+        }
+        event.preventDefault();
+        send(new URL(form.action).pathname, new FormData(form)).then(function (data) {
+            apply(data);
+            form.reset();
+        }).catch(function () {
+            form.submit();
+        });
+    });
+})();
@@ -0,0 +1,24 @@
+import time
+
+from django.db import OperationalError
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` that totals query count and time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.locked = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if 'locked' in str(exc):
+                self.locked = True
+            raise
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
@@ -0,0 +1,15 @@
+"""Cache session engine that reports session-cache hits and misses."""
+from django.contrib.sessions.backends import cache
+
+from .signals import cache_lookup
+
+
+class SessionStore(cache.SessionStore):
+
+    def load(self):
+        had_key = self.session_key is not None
+        data = super().load()
+        if had_key:
+            # The parent forgets the key when the cache had no entry for it.
+            cache_lookup.send(sender='sessions', hit=self.session_key is not None)
+        return data
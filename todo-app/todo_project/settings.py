@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,9 +41,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'todos',
+    'analytics',
+    'benchmarks',
+    'metrics',
+    'profiler',
 ]
 
 MIDDLEWARE = [
+    'metrics.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,13 +56,19 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'profiler.middleware.ProfilerMiddleware',
 ]
 
+# Per-request DB timing headers for the load-test harness (manage.py loadtest).
+if os.environ.get('TODO_SERVER_TIMING'):
+    MIDDLEWARE.insert(0, 'benchmarks.middleware.ServerTimingMiddleware')
+
 ROOT_URLCONF = 'todo_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, plus per-template render time for /metrics.
+        'BACKEND': 'metrics.templates.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +95,79 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Session store for SESSION_STORE = 'cache'. LocMemCache evicts the least
+    # recently used entries once MAX_ENTRIES is reached.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+
+# Sessions and messages
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/#configuring-the-session-engine
+#
+# Choose the session store with the TODO_SESSION_STORE environment variable:
+#   signed_cookies - signed client-side cookie, no server-side storage and
+#                    no database access; works across processes (default)
+#   cache          - local-memory LRU cache, no database access. Sessions
+#                    are per process and lost on restart, so only use it
+#                    with a single long-running process.
+#   cached_db      - cache in front of the database; writes still hit it
+#   db             - database-backed sessions in django_session
+# Flash messages always live in a cookie so mutations never need the session.
+# Run `python manage.py bench_sessions` to compare the stores.
+
+SESSION_STORES = {
+    'cache': 'todo_project.sessions',  # The cache engine, reporting hits for /metrics.
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_STORE = os.environ.get('TODO_SESSION_STORE', 'signed_cookies')
+if SESSION_STORE not in SESSION_STORES:
+    raise ImproperlyConfigured(
+        f"TODO_SESSION_STORE must be one of {', '.join(SESSION_STORES)}, not {SESSION_STORE!r}."
+    )
+SESSION_ENGINE = SESSION_STORES[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Metrics
+# Prometheus text format at /metrics. Under a pre-forking WSGI server set
+# TODO_METRICS_DIR to a directory shared by the workers (and emptied on each
+# deploy); each worker then writes its values there at most every
+# METRICS_FLUSH_INTERVAL seconds and a scrape sums all of them.
+
+METRICS_MULTIPROCESS_DIR = os.environ.get('TODO_METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 1.0
+
+
+# Per-request profiler
+# Staff can profile one request with ?profile=1 (cProfile) or ?profile=sample,
+# or an X-Profile header with the same values; browse the results in the
+# admin under "Request profiles". Off unless TODO_PROFILER=1, since a
+# profiled request costs several times its normal time and stores its SQL.
+
+PROFILER_ENABLED = os.environ.get('TODO_PROFILER', '0') == '1'
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_RATE_LIMIT = (10, 60)  # at most 10 profiled requests per 60 seconds
+PROFILER_KEEP = 50
+PROFILER_SAMPLE_INTERVAL = 0.001
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,9 @@
+"""Signals shared between apps, so that apps don't import each other.
+
+``cache_lookup`` is sent on every lookup in one of the app caches, with the
+cache's name as ``sender`` and ``hit`` telling whether it had the entry.
+The ``metrics`` app counts them; nothing needs to listen.
+"""
+from django.dispatch import Signal
+
+cache_lookup = Signal()
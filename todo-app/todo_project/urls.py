@@ -19,5 +19,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('analytics/', include('analytics.urls')),
+    path('', include('metrics.urls')),
     path('', include('todos.urls')),
 ]
@@ -1,13 +1,30 @@
 from django.contrib import admin
-from .models import Todo
+from .models import RecurrenceRule, Tag, Todo
+
+
+class RecurrenceRuleInline(admin.StackedInline):
+    """Inline editor for a TODO's recurrence rule."""
+    model = RecurrenceRule
+    extra = 0
+    max_num = 1
 
 
 @admin.register(Todo)
 class TodoAdmin(admin.ModelAdmin):
     """Admin interface for TODO model."""
     list_display = ['title', 'priority', 'due_date', 'is_resolved', 'created_at']
-    list_filter = ['is_resolved', 'priority', 'due_date', 'created_at']
+    list_filter = ['is_resolved', 'priority', 'tags', 'due_date', 'created_at']
     search_fields = ['title', 'description']
     list_editable = ['is_resolved']
     date_hierarchy = 'created_at'
     ordering = ['is_resolved', '-priority', 'due_date']
+    raw_id_fields = ['parent']
+    filter_horizontal = ['tags']
+    inlines = [RecurrenceRuleInline]
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    """Admin interface for Tag model."""
+    list_display = ['name']
+    search_fields = ['name']
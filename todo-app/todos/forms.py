@@ -1,18 +1,40 @@
 from django import forms
+from django.urls import reverse_lazy
 from django.utils import timezone
-from .models import Todo
+from .models import RecurrenceRule, Todo
 
 
 class TodoForm(forms.ModelForm):
     """Form for creating and updating TODO items."""
 
+    repeat = forms.ChoiceField(
+        choices=[('', 'Does not repeat')] + RecurrenceRule.FREQUENCY_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    repeat_interval = forms.IntegerField(
+        min_value=1,
+        max_value=365,
+        initial=1,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-input'}),
+        help_text='Repeat every N days/weeks/months',
+    )
+    repeat_until = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-input', 'type': 'date'}),
+        help_text='Optional last date of the series',
+    )
+
     class Meta:
         model = Todo
-        fields = ['title', 'description', 'due_date', 'priority', 'is_resolved']
+        fields = ['title', 'description', 'due_date', 'priority', 'parent', 'tags', 'is_resolved']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-input',
                 'placeholder': 'Enter TODO title...',
+                'autocomplete': 'off',
+                'data-autocomplete-url': reverse_lazy('todo-autocomplete'),
             }),
             'description': forms.Textarea(attrs={
                 'class': 'form-textarea',
@@ -26,11 +48,41 @@ class TodoForm(forms.ModelForm):
             'priority': forms.Select(attrs={
                 'class': 'form-select',
             }),
+            'parent': forms.Select(attrs={
+                'class': 'form-select',
+            }),
+            'tags': forms.CheckboxSelectMultiple(attrs={
+                'class': 'form-checkbox',
+            }),
             'is_resolved': forms.CheckboxInput(attrs={
                 'class': 'form-checkbox',
             }),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        parent_field = self.fields['parent']
+        parent_field.empty_label = 'No parent (top-level TODO)'
+        parent_field.queryset = Todo.objects.order_by('path', 'title')
+        if self.instance.pk:
+            # A TODO can't be nested under itself or any of its own subtasks.
+            parent_field.queryset = parent_field.queryset.exclude(pk=self.instance.pk).exclude(
+                Todo.subtree_filter(self.instance.subtree_prefix)
+            )
+        self.rule = None
+        if self.instance.pk:
+            self.rule = RecurrenceRule.objects.filter(todo=self.instance).first()
+        if self.rule:
+            self.initial.update({
+                'repeat': self.rule.frequency,
+                'repeat_interval': self.rule.interval,
+                'repeat_until': self.rule.until,
+            })
+        if self.instance.occurrence_of_id:
+            # A stored occurrence belongs to its series; it can't start one.
+            for name in ('repeat', 'repeat_interval', 'repeat_until'):
+                del self.fields[name]
+
     def clean_due_date(self):
         """Validate that due date is not in the past for new TODOs."""
         due_date = self.cleaned_data.get('due_date')
@@ -42,4 +94,46 @@ class TodoForm(forms.ModelForm):
 
         return due_date
 
+    def clean(self):
+        cleaned_data = super().clean()
+        repeat = cleaned_data.get('repeat')
+        if repeat:
+            due_date = cleaned_data.get('due_date')
+            if not due_date:
+                self.add_error('due_date', 'Recurring TODOs need a due date to start the series.')
+            until = cleaned_data.get('repeat_until')
+            if due_date and until and until < due_date:
+                self.add_error('repeat_until', 'The series cannot end before it starts.')
+        return cleaned_data
+
+    def save(self, commit=True):
+        todo = super().save(commit)
+        if commit:
+            self._save_recurrence()
+        else:
+            save_m2m = self.save_m2m
 
+            def save_related():
+                save_m2m()
+                self._save_recurrence()
+            self.save_m2m = save_related
+        return todo
+
+    def _save_recurrence(self):
+        """Create, update or remove the recurrence rule to match the repeat fields."""
+        if 'repeat' not in self.fields:
+            return
+        repeat = self.cleaned_data.get('repeat')
+        if not repeat:
+            if self.rule:
+                self.rule.delete()
+                self.rule = None
+            return
+        values = {
+            'frequency': repeat,
+            'interval': self.cleaned_data.get('repeat_interval') or 1,
+            'until': self.cleaned_data.get('repeat_until'),
+        }
+        if self.rule and all(getattr(self.rule, name) == value for name, value in values.items()):
+            return
+        self.rule, _ = RecurrenceRule.objects.update_or_create(todo=self.instance, defaults=values)
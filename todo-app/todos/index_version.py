@@ -0,0 +1,31 @@
+"""Version stamps that keep per-process in-memory indexes in sync.
+
+Every process holds its own copy of an index (see ``todos.tag_index``), so a
+write applied through one process must reach the others. Each committed
+write bumps a counter in the default cache. A process whose copy was built
+at the previous version applies the write incrementally and moves along to
+the new one. Any other process finds its version stale on its next lookup
+and rebuilds from the database.
+
+This only reaches other processes when the default cache is shared between
+them (Memcached, Redis or the database cache).
+"""
+from django.core.cache import cache
+
+
+class SharedVersion:
+    """A counter in the default cache, bumped on every write to an index."""
+
+    def __init__(self, key):
+        self.key = key
+
+    def current(self):
+        return cache.get_or_set(self.key, 0, None)
+
+    def bump(self):
+        """Increment the version and return the new value."""
+        try:
+            return cache.incr(self.key)
+        except ValueError:  # never set, or evicted
+            cache.add(self.key, 0, None)
+            return cache.incr(self.key)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+DATABASE_ENGINES = ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db')
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete rows from django_session in small batches so SQLite is never locked for long. '
+        'By default only expired sessions are removed; --all clears the backlog left behind '
+        'after switching TODO_SESSION_STORE away from the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Delete every session row, not only expired ones.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement (default: 1000).')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if options['all'] and settings.SESSION_ENGINE in DATABASE_ENGINES:
+            raise CommandError(
+                f"Sessions are still stored in the database (SESSION_ENGINE={settings.SESSION_ENGINE}); "
+                "--all would log everyone out. Purge expired sessions only, or switch stores first."
+            )
+
+        sessions = Session.objects.all()
+        if not options['all']:
+            sessions = sessions.filter(expire_date__lt=timezone.now())
+
+        if options['dry_run']:
+            self.stdout.write(f'{sessions.count()} session rows would be deleted.')
+            return
+
+        deleted = 0
+        while True:
+            keys = list(sessions.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} session rows.'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.db.models.functions import Length
+
+from todos import ranking
+from todos.models import Todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Respace the manual-order rank keys evenly, keeping the current order. '
+        'Only runs when the longest key exceeds --max-length, unless --force is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-length', type=int, default=ranking.REBALANCE_LENGTH,
+            help=f'Rebalance once any key is longer than this (default: {ranking.REBALANCE_LENGTH}).',
+        )
+        parser.add_argument('--force', action='store_true', help='Rebalance regardless of key length.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE statement (default: 500).')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the longest key.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        longest = Todo.objects.aggregate(longest=Max(Length('rank')))['longest'] or 0
+        if options['dry_run']:
+            self.stdout.write(f'Longest rank key: {longest} characters.')
+            return
+        if longest <= options['max_length'] and not options['force']:
+            self.stdout.write(f"Longest rank key is {longest} characters; no rebalance needed.")
+            return
+
+        count = ranking.rebalance(batch_size=options['batch_size'])
+        after = Todo.objects.aggregate(longest=Max(Length('rank')))['longest'] or 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebalanced {count} TODOs: longest rank key {longest} -> {after} characters.'
+        ))
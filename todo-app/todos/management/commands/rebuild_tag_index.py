@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from todos.tag_index import tag_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the in-memory tag index and tell other processes to rebuild theirs.'
+
+    def handle(self, *args, **options):
+        tag_index.invalidate()
+        stats = tag_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt tag index: {stats['tags']} tags, {stats['postings']} postings, "
+            f"{stats['bytes']} bytes."
+        ))
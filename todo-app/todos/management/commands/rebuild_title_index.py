@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from todos.title_index import title_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the in-memory title autocomplete index and tell other processes to rebuild theirs.'
+
+    def handle(self, *args, **options):
+        title_index.invalidate()
+        stats = title_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt title index: {stats['titles']} active TODOs, {stats['distinct']} distinct titles."
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Optional parent TODO this is a subtask of', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='todos.todo'),
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Materialized path of ancestor ids', max_length=220),
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='subtask_done_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0002_todo_subtasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Tag name', max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='tags',
+            field=models.ManyToManyField(blank=True, help_text='Optional tags for filtering', related_name='todos', to='todos.tag'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0003_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['due_date', 'priority', 'is_resolved'], name='todo_due_date_idx'),
+        ),
+    ]
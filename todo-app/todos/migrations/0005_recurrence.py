@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0004_todo_due_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='occurrence_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecurrenceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], default='weekly', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1, help_text='Repeat every N days/weeks/months')),
+                ('until', models.DateField(blank=True, help_text='Optional last date of the series', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('todo', models.OneToOneField(help_text='The TODO that starts the series', on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='todos.todo')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='occurrence_of',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Recurrence rule this row was materialized from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='todos.recurrencerule'),
+        ),
+        migrations.AddConstraint(
+            model_name='todo',
+            constraint=models.UniqueConstraint(fields=('occurrence_of', 'occurrence_date'), name='todo_unique_occurrence'),
+        ),
+    ]
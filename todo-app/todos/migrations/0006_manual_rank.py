@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:32
+
+from django.db import migrations, models
+
+# A frozen copy of todos.ranking.spread() as of this migration, so later
+# changes to the live key scheme cannot change what this migration writes.
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+WIDTH = 6
+SPACE = BASE ** WIDTH
+STEP = BASE ** 2
+
+
+def encode(value):
+    digits = []
+    for _ in range(WIDTH):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def spread(count):
+    spacing = min(STEP, SPACE // (count + 1))
+    return [encode((i + 1) * spacing) for i in range(count)]
+
+
+def rank_existing_todos(apps, schema_editor):
+    """Seed the manual order with the current default order."""
+    Todo = apps.get_model('todos', 'Todo')
+    todos = list(Todo.objects.order_by('is_resolved', '-priority', 'due_date', '-created_at').only('pk'))
+    for todo, rank in zip(todos, spread(len(todos))):
+        todo.rank = rank
+    Todo.objects.bulk_update(todos, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0005_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todo',
+            name='rank',
+            field=models.CharField(default='', editable=False, help_text='Lexicographic key of the manual order', max_length=64),
+        ),
+        migrations.RunPython(rank_existing_todos, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['rank', 'id'], name='todo_rank_idx'),
+        ),
+    ]
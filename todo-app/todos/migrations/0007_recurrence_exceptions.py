@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0006_manual_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurrenceException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='todos.recurrencerule')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('rule', 'date'), name='recurrence_unique_exception')],
+            },
+        ),
+    ]
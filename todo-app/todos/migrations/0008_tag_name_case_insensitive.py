@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """Fold tags differing only in case into the oldest one before the constraint."""
+    Tag = apps.get_model('todos', 'Tag')
+    Link = apps.get_model('todos', 'Todo').tags.through
+    keep = {}
+    for tag in Tag.objects.order_by('pk'):
+        survivor = keep.setdefault(tag.name.lower(), tag)
+        if survivor.pk == tag.pk:
+            continue
+        linked = set(Link.objects.filter(tag=survivor).values_list('todo_id', flat=True))
+        Link.objects.bulk_create([
+            Link(todo_id=todo_id, tag_id=survivor.pk)
+            for todo_id in Link.objects.filter(tag=tag).values_list('todo_id', flat=True)
+            if todo_id not in linked
+        ])
+        tag.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0007_recurrence_exceptions'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='tag_unique_name_ci', violation_error_message='A tag with this name already exists.'),
+        ),
+    ]
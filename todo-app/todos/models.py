@@ -1,6 +1,30 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Concat, Length, Lower, Substr
 from django.utils import timezone
 from django.urls import reverse
+from django.core.exceptions import ValidationError
+
+from .ranking import rank_after
+
+
+class Tag(models.Model):
+    """Model representing a label that can be attached to TODOs."""
+
+    name = models.CharField(max_length=50, unique=True, help_text='Tag name')
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            # Tags are matched case-insensitively (see ``todos.tag_index``).
+            models.UniqueConstraint(
+                Lower('name'), name='tag_unique_name_ci',
+                violation_error_message='A tag with this name already exists.',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 class Todo(models.Model):
@@ -12,6 +36,16 @@ class Todo(models.Model):
         ('high', 'High'),
     ]
 
+    # Each ancestor id is zero-padded to a fixed width so that lexical order
+    # of paths matches tree order and a subtree is one contiguous key range.
+    PATH_STEP_WIDTH = 10
+    PATH_SEPARATOR = '/'
+    MAX_DEPTH = 20
+    TREE_MANAGED_FIELDS = frozenset({'path', 'subtask_count', 'subtask_done_count'})
+    # Only ever written by ``todos.ranking``, so a stale save can't undo a move.
+    RANK_MANAGED_FIELDS = frozenset({'rank'})
+    PERSISTED_VALUE_FIELDS = ('parent_id', 'is_resolved', 'priority', 'due_date')
+
     title = models.CharField(max_length=200, help_text='Enter the TODO title')
     description = models.TextField(blank=True, null=True, help_text='Optional detailed description')
     due_date = models.DateField(blank=True, null=True, help_text='Optional due date')
@@ -22,11 +56,60 @@ class Todo(models.Model):
         default='medium',
         help_text='Priority level'
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='children',
+        help_text='Optional parent TODO this is a subtask of'
+    )
+    tags = models.ManyToManyField(
+        Tag,
+        blank=True,
+        related_name='todos',
+        help_text='Optional tags for filtering'
+    )
+    path = models.CharField(
+        max_length=(PATH_STEP_WIDTH + 1) * MAX_DEPTH,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text='Materialized path of ancestor ids'
+    )
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    subtask_done_count = models.PositiveIntegerField(default=0, editable=False)
+    occurrence_of = models.ForeignKey(
+        'RecurrenceRule',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name='occurrences',
+        help_text='Recurrence rule this row was materialized from'
+    )
+    occurrence_date = models.DateField(blank=True, null=True, editable=False)
+    rank = models.CharField(
+        max_length=64,
+        default='',
+        editable=False,
+        help_text='Lexicographic key of the manual order'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['is_resolved', '-priority', 'due_date', '-created_at']
+        indexes = [
+            # Covers the calendar's per-day GROUP BY without touching the table.
+            models.Index(fields=['due_date', 'priority', 'is_resolved'], name='todo_due_date_idx'),
+            # Serves the manual sort mode's ORDER BY rank, id.
+            models.Index(fields=['rank', 'id'], name='todo_rank_idx'),
+        ]
+        constraints = [
+            # An occurrence is materialized at most once, however many clients race.
+            models.UniqueConstraint(fields=['occurrence_of', 'occurrence_date'], name='todo_unique_occurrence'),
+        ]
         verbose_name = 'TODO'
         verbose_name_plural = 'TODOs'
 
@@ -42,3 +125,257 @@ class Todo(models.Model):
     def get_absolute_url(self):
         """Returns the URL to access a particular TODO instance."""
         return reverse('todo-detail', args=[str(self.id)])
+
+    # ----------------------------------------
+    # Subtask tree
+    # ----------------------------------------
+
+    @property
+    def subtree_prefix(self):
+        """Path prefix shared by every descendant of this TODO."""
+        return f'{self.path}{self.pk:0{self.PATH_STEP_WIDTH}d}{self.PATH_SEPARATOR}'
+
+    @property
+    def depth(self):
+        """Number of ancestors above this TODO (0 for top-level TODOs)."""
+        return len(self.ancestor_ids)
+
+    @property
+    def ancestor_ids(self):
+        """Ids of all ancestors, root first, parsed from the materialized path."""
+        return [int(step) for step in self.path.split(self.PATH_SEPARATOR) if step]
+
+    @property
+    def has_subtasks(self):
+        return self.subtask_count > 0
+
+    @property
+    def subtask_progress(self):
+        """Percentage of subtasks (at any depth) that are resolved."""
+        if not self.subtask_count:
+            return 0
+        return round(100 * self.subtask_done_count / self.subtask_count)
+
+    @classmethod
+    def subtree_filter(cls, prefix):
+        """Range lookup matching every path that starts with ``prefix``.
+
+        Expressed as ``>=``/``<`` bounds rather than ``startswith`` so that
+        every backend can answer it from the index on ``path``.
+        """
+        upper = prefix[:-1] + chr(ord(cls.PATH_SEPARATOR) + 1)
+        return models.Q(path__gte=prefix, path__lt=upper)
+
+    def get_descendants(self):
+        """All subtasks at any depth, in depth-first order, in one query."""
+        return Todo.objects.filter(self.subtree_filter(self.subtree_prefix)).order_by('path', 'pk')
+
+    def get_ancestors(self):
+        """All ancestors, root first."""
+        ancestors = Todo.objects.in_bulk(self.ancestor_ids)
+        return [ancestors[pk] for pk in self.ancestor_ids if pk in ancestors]
+
+    def clean(self):
+        super().clean()
+        if not self.parent_id:
+            return
+        if self.pk and self.parent_id == self.pk:
+            raise ValidationError({'parent': 'A TODO cannot be its own parent.'})
+        parent_path = self.parent.path
+        if self.pk and parent_path.startswith(self.subtree_prefix):
+            raise ValidationError({'parent': 'A TODO cannot be moved under one of its own subtasks.'})
+        # The whole subtree moves along, so its deepest TODO must still fit.
+        if self.parent.depth + 1 + self.subtree_height() >= self.MAX_DEPTH:
+            raise ValidationError({'parent': f'Subtasks cannot be nested more than {self.MAX_DEPTH} levels deep.'})
+
+    def subtree_height(self):
+        """Levels of subtasks below this TODO (0 without subtasks), in one query."""
+        if not self.pk:
+            return 0
+        longest = Todo.objects.filter(self.subtree_filter(self.subtree_prefix)).aggregate(
+            longest=Max(Length('path'))
+        )['longest']
+        if longest is None:
+            return 0
+        return longest // (self.PATH_STEP_WIDTH + 1) - self.depth
+
+    def save(self, *args, **kwargs):
+        """Save the TODO and keep the materialized path and rolled-up counters in sync.
+
+        The tree-managed columns are only ever written here through targeted
+        UPDATEs, so saving a stale instance can never clobber counters that
+        were bumped by a subtask in the meantime.
+
+        The row as it was before this save is exposed to ``post_save``
+        receivers as ``instance._persisted_values`` (``None`` on insert).
+
+        New TODOs are appended to the end of the manual order; after that the
+        rank only changes through ``todos.ranking``.
+        """
+        using = kwargs.get('using')
+        with transaction.atomic(using=using):
+            old_state = None
+            if not self._state.adding:
+                old_state = (
+                    Todo.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values(*self.PERSISTED_VALUE_FIELDS, 'path', 'subtask_count', 'subtask_done_count', 'rank')
+                    .first()
+                )
+
+            if old_state is None:
+                self._persisted_values = None
+                self.path = self._path_under(self.parent_id)
+                if not self.rank:
+                    self.rank = rank_after(Todo.objects.aggregate(last=Max('rank'))['last'] or '')
+                super().save(*args, **kwargs)
+                self._adjust_ancestors(self.path, 1, int(self.is_resolved))
+                return
+
+            self._persisted_values = {name: old_state[name] for name in self.PERSISTED_VALUE_FIELDS}
+            old_parent_id, old_resolved, old_path = old_state['parent_id'], old_state['is_resolved'], old_state['path']
+            self.subtask_count = old_state['subtask_count']
+            self.subtask_done_count = old_state['subtask_done_count']
+            self.rank = old_state['rank']
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            update_fields = set(update_fields) - self.TREE_MANAGED_FIELDS - self.RANK_MANAGED_FIELDS
+
+            reparented = self.parent_id != old_parent_id
+            self.path = self._path_under(self.parent_id) if reparented else old_path
+            if reparented:
+                update_fields.add('path')
+            kwargs['update_fields'] = update_fields
+            super().save(*args, **kwargs)
+
+            if reparented:
+                self._move_subtree(old_path, old_resolved)
+            elif self.is_resolved != old_resolved:
+                self._adjust_ancestors(self.path, 0, 1 if self.is_resolved else -1)
+
+    save.alters_data = True
+
+    @classmethod
+    def _path_under(cls, parent_id):
+        """Materialized path for a TODO placed directly under ``parent_id``."""
+        if not parent_id:
+            return ''
+        return Todo.objects.only('path').get(pk=parent_id).subtree_prefix
+
+    @classmethod
+    def _adjust_ancestors(cls, path, total_delta, done_delta):
+        """Add the given deltas to the rolled-up counters of every ancestor in ``path``."""
+        ancestor_ids = [int(step) for step in path.split(cls.PATH_SEPARATOR) if step]
+        if not ancestor_ids or not (total_delta or done_delta):
+            return
+        Todo.objects.filter(pk__in=ancestor_ids).update(
+            subtask_count=F('subtask_count') + total_delta,
+            subtask_done_count=F('subtask_done_count') + done_delta,
+        )
+
+    def _move_subtree(self, old_path, old_resolved):
+        """Re-root this TODO's subtree after its parent changed."""
+        old_prefix = f'{old_path}{self.pk:0{self.PATH_STEP_WIDTH}d}{self.PATH_SEPARATOR}'
+        new_prefix = self.subtree_prefix
+        Todo.objects.filter(self.subtree_filter(old_prefix)).update(
+            path=Concat(models.Value(new_prefix), Substr('path', len(old_prefix) + 1))
+        )
+        self._adjust_ancestors(
+            old_path,
+            -(1 + self.subtask_count),
+            -(int(old_resolved) + self.subtask_done_count),
+        )
+        self._adjust_ancestors(
+            self.path,
+            1 + self.subtask_count,
+            int(self.is_resolved) + self.subtask_done_count,
+        )
+
+
+class RecurrenceRule(models.Model):
+    """Model describing how a TODO repeats.
+
+    The TODO the rule is attached to is the first occurrence and its due date
+    anchors the series. Later occurrences are computed on demand (see
+    ``todos.recurrence``) and only stored as rows once edited or completed.
+    """
+
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    todo = models.OneToOneField(
+        Todo,
+        on_delete=models.CASCADE,
+        related_name='recurrence',
+        help_text='The TODO that starts the series'
+    )
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    interval = models.PositiveSmallIntegerField(default=1, help_text='Repeat every N days/weeks/months')
+    until = models.DateField(blank=True, null=True, help_text='Optional last date of the series')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.todo} ({self.describe()})'
+
+    def describe(self):
+        """Human readable summary, e.g. ``every 2 weeks until Mar 01, 2026``."""
+        unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}[self.frequency]
+        text = f'every {unit}' if self.interval == 1 else f'every {self.interval} {unit}s'
+        if self.until:
+            text += f' until {self.until:%b %d, %Y}'
+        return text
+
+    def clean(self):
+        super().clean()
+        if self.interval < 1:
+            raise ValidationError({'interval': 'The interval must be at least 1.'})
+
+    def materialize(self, day):
+        """Return the stored TODO for the occurrence on ``day``, creating it from the series."""
+        master = self.todo
+        with transaction.atomic():
+            todo, created = Todo.objects.get_or_create(
+                occurrence_of=self,
+                occurrence_date=day,
+                defaults={
+                    'title': master.title,
+                    'description': master.description,
+                    'priority': master.priority,
+                    'due_date': day,
+                    'parent_id': master.parent_id,
+                },
+            )
+            if created:
+                todo.tags.set(master.tags.all())
+        return todo
+
+
+class RecurrenceException(models.Model):
+    """A date removed from a series, so no occurrence is computed for it again.
+
+    Recorded when the stored row of an occurrence is deleted; without it the
+    date would fall back to being a computed occurrence.
+    """
+
+    rule = models.ForeignKey(RecurrenceRule, on_delete=models.CASCADE, related_name='exceptions')
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['rule', 'date'], name='recurrence_unique_exception'),
+        ]
+
+    def __str__(self):
+        return f'{self.rule.todo} skipped on {self.date}'
+
+    @classmethod
+    def record(cls, rule_id, day):
+        """Skip ``day`` in the series of ``rule_id``, if the series still exists."""
+        if RecurrenceRule.objects.filter(pk=rule_id).exists():
+            cls.objects.get_or_create(rule_id=rule_id, date=day)
@@ -0,0 +1,176 @@
+"""Lexicographic rank keys for the manual ("drag and drop") order.
+
+A rank is a string of base-36 digits read as a fraction ``0.d1d2d3...``.
+Keys never end in ``0``, so comparing two keys as strings compares them as
+numbers, and there is always a key strictly between two different ones.
+Moving a TODO therefore rewrites only that TODO's rank.
+
+The first ``WIDTH`` digits act as an integer part: appending and prepending
+step that part by ``STEP`` so keys stay ``WIDTH`` characters long, while
+inserting between neighbours takes the shortest midpoint key. Repeatedly
+inserting into the same gap makes keys grow by about one character per six
+moves; ``manage.py rebalance_ranks`` respaces them when they get long.
+"""
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+WIDTH = 6
+SPACE = BASE ** WIDTH
+STEP = BASE ** 2
+MAX_LENGTH = 64
+REBALANCE_LENGTH = 16
+
+
+class RankError(Exception):
+    """Raised when a TODO cannot be placed at the requested position."""
+
+
+def encode(value):
+    """``WIDTH``-digit key for an integer part in ``(0, SPACE)``."""
+    digits = []
+    for _ in range(WIDTH):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def decode(key):
+    """Integer part of ``key`` (its first ``WIDTH`` digits)."""
+    value = 0
+    for char in key[:WIDTH].ljust(WIDTH, '0'):
+        value = value * BASE + DIGITS.index(char)
+    return value
+
+
+def midpoint(low, high):
+    """Shortest key strictly between ``low`` and ``high``.
+
+    ``low`` may be ``''`` (before everything) and ``high`` may be ``None``
+    (after everything); otherwise ``low < high`` is required.
+    """
+    if high is not None:
+        if low >= high:
+            raise RankError(f'{low!r} does not sort before {high!r}')
+        shared = 0
+        while shared < len(high) and (low[shared] if shared < len(low) else '0') == high[shared]:
+            shared += 1
+        if shared:
+            return high[:shared] + midpoint(low[shared:], high[shared:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + midpoint(low[1:], None)
+
+
+def rank_after(key):
+    """Key for a TODO appended after ``key`` (or the first TODO if ``key`` is empty)."""
+    if not key:
+        return encode(SPACE // 2)
+    value = decode(key) + STEP
+    return encode(value) if value < SPACE else midpoint(key, None)
+
+
+def rank_before(key):
+    """Key for a TODO prepended before ``key``."""
+    value = decode(key) - STEP
+    return encode(value) if value > 0 else midpoint('', key)
+
+
+def rank_between(low, high):
+    """Key for a TODO placed between ``low`` and ``high`` (either may be open)."""
+    if high is None:
+        return rank_after(low)
+    if not low:
+        return rank_before(high)
+    return midpoint(low, high)
+
+
+@contextmanager
+def write_transaction():
+    """``transaction.atomic()`` that takes the write lock when it begins.
+
+    SQLite ignores ``SELECT ... FOR UPDATE`` and by default starts
+    transactions deferred, so two writers that both read first fail to
+    upgrade their read locks instead of queueing. Only this block begins
+    with ``BEGIN IMMEDIATE``; other transactions keep SQLite's default.
+    Inside an already open transaction this is a plain savepoint.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
+
+
+def spread(count):
+    """``count`` evenly spaced ``WIDTH``-digit keys, as short as the spacing allows."""
+    spacing = min(STEP, SPACE // (count + 1))
+    return [encode((i + 1) * spacing) for i in range(count)]
+
+
+def move(pk, before=None, after=None):
+    """Place TODO ``pk`` right after ``before`` (or right before ``after``).
+
+    The client's view of the neighbours may be stale, so the key is taken
+    from the anchor's *current* neighbour rather than from both ids sent
+    by the client: another TODO dropped into the same gap a moment earlier
+    is kept in place. Concurrent moves run one after the other: the anchor
+    rows are locked with ``SELECT ... FOR UPDATE`` where the database
+    supports it, and on SQLite ``write_transaction()`` takes the write lock
+    up front. A move still waiting when the
+    lock times out raises ``OperationalError``. Exactly one row is updated.
+    Returns the new rank.
+    """
+    from .models import Todo
+
+    if not before and not after:
+        raise RankError('A move needs a TODO to go after or before.')
+    ids = {i for i in (pk, before, after) if i}
+    with write_transaction():
+        ranks = dict(
+            Todo.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', 'rank')
+        )
+        if pk not in ranks:
+            raise Todo.DoesNotExist(f'TODO {pk} does not exist.')
+        missing = ids - ranks.keys()
+        if missing:
+            raise RankError(f'TODO {min(missing)} no longer exists.')
+
+        others = Todo.objects.exclude(pk=pk).order_by('rank', 'pk').values_list('rank', flat=True)
+        if before:
+            low = ranks[before]
+            high = others.filter(rank__gt=low).first()
+        else:
+            high = ranks[after]
+            low = others.filter(rank__lt=high).last() or ''
+        rank = rank_between(low, high)
+        if len(rank) > MAX_LENGTH:
+            raise RankError('Rank keys are exhausted here; run "manage.py rebalance_ranks".')
+        Todo.objects.filter(pk=pk).update(rank=rank)
+    return rank
+
+
+def rebalance(batch_size=500):
+    """Respace every rank evenly in the current manual order; returns the number of TODOs."""
+    from .models import Todo
+
+    with write_transaction():
+        todos = list(Todo.objects.select_for_update().order_by('rank', 'pk').only('pk', 'rank'))
+        for todo, rank in zip(todos, spread(len(todos))):
+            todo.rank = rank
+        Todo.objects.bulk_update(todos, ['rank'], batch_size=batch_size)
+    return len(todos)
@@ -0,0 +1,302 @@
+"""Lazy expansion of recurring TODOs.
+
+Only the first TODO of a series is stored, together with its
+``RecurrenceRule``. Later occurrences are computed for the date window being
+displayed, cached per window, and spliced into querysets at the position the
+list ordering would have given them. An occurrence becomes a real row (see
+``RecurrenceRule.materialize``) only once it is edited or completed.
+"""
+import calendar
+from datetime import timedelta
+from functools import cached_property, reduce
+from operator import attrgetter, or_
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from todo_project.signals import cache_lookup
+
+RECURRENCE_CACHE_TIMEOUT = 60 * 60
+VERSION_CACHE_KEY = 'todos:recurrence:version'
+SERIES_CACHE_KEY = 'todos:recurrence:series'
+# Filtered counts per position aggregate; SQLite caps a result set at 2000 columns.
+POSITION_BATCH_SIZE = 250
+
+
+class Occurrence:
+    """A computed, not yet stored, occurrence of a recurring TODO.
+
+    Exposes the attributes the list templates and orderings read from a
+    ``Todo`` so both can be rendered and sorted side by side.
+    """
+    is_virtual = True
+    is_resolved = False
+    subtask_count = 0
+
+    def __init__(self, rule_id, series_id, due_date, title, description, priority, tag_names, created_at):
+        self.rule_id = rule_id
+        self.series_id = series_id
+        self.due_date = due_date
+        self.title = title
+        self.description = description
+        self.priority = priority
+        self.tag_names = tag_names
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f'<Occurrence: {self.title} on {self.due_date}>'
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Occurrence)
+            and (self.rule_id, self.due_date) == (other.rule_id, other.due_date)
+        )
+
+    def __hash__(self):
+        return hash((self.rule_id, self.due_date))
+
+    @property
+    def dom_id(self):
+        return f'occurrence-{self.rule_id}-{self.due_date:%Y%m%d}'
+
+    def get_priority_display(self):
+        from .models import Todo
+        return dict(Todo.PRIORITY_CHOICES).get(self.priority, self.priority)
+
+    def is_overdue(self):
+        return False
+
+    def get_edit_url(self):
+        return reverse('todo-occurrence-edit', args=[self.rule_id, self.due_date.isoformat()])
+
+    def get_complete_url(self):
+        return reverse('todo-occurrence-complete', args=[self.rule_id, self.due_date.isoformat()])
+
+
+# ----------------------------------------
+# Date arithmetic
+# ----------------------------------------
+
+def shift(anchor, frequency, steps):
+    """The date ``steps`` periods of ``frequency`` after ``anchor``.
+
+    Monthly series keep the anchor's day of month, clamped to the length of
+    shorter months (Jan 31 -> Feb 28 -> Mar 31).
+    """
+    if frequency == 'daily':
+        return anchor + timedelta(days=steps)
+    if frequency == 'weekly':
+        return anchor + timedelta(weeks=steps)
+    year, month = divmod(anchor.year * 12 + anchor.month - 1 + steps, 12)
+    month += 1
+    return anchor.replace(year=year, month=month, day=min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_dates(anchor, frequency, interval, until, start, end):
+    """Yield the dates after ``anchor`` in ``[start, end)`` on which the series occurs."""
+    if until is not None and until < end:
+        end = until + timedelta(days=1)
+    if frequency == 'monthly':
+        elapsed = (start.year - anchor.year) * 12 + start.month - anchor.month
+        step = max(1, elapsed // interval)
+    else:
+        period = interval * (7 if frequency == 'weekly' else 1)
+        step = max(1, -(-(start - anchor).days // period))
+    while True:
+        day = shift(anchor, frequency, step * interval)
+        if day >= end:
+            return
+        if day >= start:
+            yield day
+        step += 1
+
+
+def occurs_on(rule, day):
+    """Whether ``rule`` has a (non-anchor, not skipped) occurrence on ``day``."""
+    anchor = rule.todo.due_date
+    if anchor is None or day <= anchor:
+        return False
+    return (
+        any(occurrence_dates(anchor, rule.frequency, rule.interval, rule.until, day, day + timedelta(days=1)))
+        and not rule.exceptions.filter(date=day).exists()
+    )
+
+
+# ----------------------------------------
+# Window expansion and cache
+# ----------------------------------------
+
+def window_cache_key(start, end):
+    version = cache.get_or_set(VERSION_CACHE_KEY, 1, None)
+    return f'todos:recurrence:{version}:{start.isoformat()}:{end.isoformat()}'
+
+
+def build_window(start, end):
+    """Compute every unmaterialized occurrence due in ``[start, end)``.
+
+    One query for the rules (with their first TODO and its tags) and, if
+    there are any, one for the dates in the window that are already stored
+    or were skipped (see ``RecurrenceException``).
+    """
+    from .models import RecurrenceException, RecurrenceRule, Todo
+
+    rules = list(
+        RecurrenceRule.objects.select_related('todo')
+        .prefetch_related('todo__tags')
+        .filter(todo__due_date__lt=end)
+        .filter(Q(until__isnull=True) | Q(until__gte=start))
+    )
+    if not rules:
+        return []
+    stored = set(
+        Todo.objects.filter(occurrence_of__in=rules, occurrence_date__gte=start, occurrence_date__lt=end)
+        .order_by().values_list('occurrence_of_id', 'occurrence_date')
+        .union(
+            RecurrenceException.objects.filter(rule__in=rules, date__gte=start, date__lt=end)
+            .order_by().values_list('rule_id', 'date')
+        )
+    )
+    occurrences = []
+    for rule in rules:
+        series = rule.todo
+        tag_names = [tag.name for tag in series.tags.all()]
+        for day in occurrence_dates(series.due_date, rule.frequency, rule.interval, rule.until, start, end):
+            if (rule.pk, day) in stored:
+                continue
+            occurrences.append(Occurrence(
+                rule.pk, series.pk, day, series.title, series.description,
+                series.priority, tag_names, series.created_at,
+            ))
+    return occurrences
+
+
+def expand_window(start, end):
+    """Return the occurrences due in ``[start, end)``, computing them on a cache miss."""
+    key = window_cache_key(start, end)
+    occurrences = cache.get(key)
+    cache_lookup.send(sender='recurrence_window', hit=occurrences is not None)
+    if occurrences is None:
+        occurrences = build_window(start, end)
+        cache.set(key, occurrences, RECURRENCE_CACHE_TIMEOUT)
+    return occurrences
+
+
+def series_ids():
+    """Ids of the TODOs that start a series, cached alongside the windows."""
+    ids = cache.get(SERIES_CACHE_KEY)
+    cache_lookup.send(sender='recurrence_series', hit=ids is not None)
+    if ids is None:
+        from .models import RecurrenceRule
+        ids = frozenset(RecurrenceRule.objects.values_list('todo_id', flat=True))
+        cache.set(SERIES_CACHE_KEY, ids, RECURRENCE_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate_windows(rules_changed=False):
+    """Orphan every cached window by bumping the version in their keys."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+    if rules_changed:
+        cache.delete(SERIES_CACHE_KEY)
+
+
+# ----------------------------------------
+# Merging with querysets
+# ----------------------------------------
+
+def sort_like(items, ordering):
+    """Sort ``items`` in place the way ``ORDER BY ordering`` would (stable, multi-key)."""
+    for field in reversed(ordering):
+        items.sort(key=attrgetter(field.lstrip('-')), reverse=field.startswith('-'))
+    return items
+
+
+def rows_before(model, ordering, item):
+    """Q matching the rows ``ORDER BY ordering`` puts before ``item``.
+
+    Rows that tie with ``item`` on every key count as before it, so computed
+    occurrences always follow stored rows with identical sort keys.
+    """
+    nulls_largest = connection.features.nulls_order_largest
+    branches = []
+    tied = Q()
+    for field in ordering:
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        value = getattr(item, name)
+        branches.append(tied & Q(**{f'{name}__{"gt" if descending else "lt"}': value}))
+        if model._meta.get_field(name).null and descending == nulls_largest:
+            branches.append(tied & Q(**{f'{name}__isnull': True}))
+        tied &= Q(**{name: value})
+    branches.append(tied)
+    return reduce(or_, branches)
+
+
+class OccurrenceMergedList:
+    """A sliceable sequence of a queryset with occurrences spliced in at their sort positions.
+
+    The position of every occurrence is found with aggregate queries of
+    filtered counts (one count per distinct sort key, batched to stay under
+    the database's column limit), and each slice then costs one
+    ``LIMIT/OFFSET`` query, so it can be handed to a ``Paginator`` in place
+    of the queryset.
+    """
+
+    def __init__(self, queryset, occurrences):
+        self.queryset = queryset
+        self.ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        self.occurrences = sort_like(list(occurrences), self.ordering)
+
+    @cached_property
+    def positions(self):
+        if not self.occurrences:
+            return []
+        names = [field.lstrip('-') for field in self.ordering]
+        keys = [tuple(getattr(occurrence, name) for name in names) for occurrence in self.occurrences]
+        # Occurrences with equal sort keys share one count.
+        representatives = dict(zip(reversed(keys), reversed(self.occurrences)))
+        distinct = list(representatives)
+        queryset = self.queryset.order_by()
+        before = {}
+        for offset in range(0, len(distinct), POSITION_BATCH_SIZE):
+            batch = distinct[offset:offset + POSITION_BATCH_SIZE]
+            counts = queryset.aggregate(**{
+                f'k{i}': Count('pk', filter=rows_before(self.queryset.model, self.ordering, representatives[key]))
+                for i, key in enumerate(batch)
+            })
+            before.update((key, counts[f'k{i}']) for i, key in enumerate(batch))
+        return [before[key] + i for i, key in enumerate(keys)]
+
+    @cached_property
+    def _count(self):
+        return self.queryset.count() + len(self.occurrences)
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            items = self[key:key + 1]
+            if not items:
+                raise IndexError('OccurrenceMergedList index out of range')
+            return items[0]
+        start, stop, _ = key.indices(len(self))
+        placed = {
+            position: occurrence
+            for position, occurrence in zip(self.positions, self.occurrences)
+            if start <= position < stop
+        }
+        skipped = sum(1 for position in self.positions if position < start)
+        rows = iter(self.queryset[start - skipped:stop - skipped - len(placed)])
+        items = [placed[position] if position in placed else next(rows, None) for position in range(start, stop)]
+        return [item for item in items if item is not None]
@@ -0,0 +1,76 @@
+"""Per-month due-date summaries backing the calendar view.
+
+A month is summarised by one aggregated query over the ``due_date`` index
+and cached until a TODO whose (old or new) due date falls in that month is
+written.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from todo_project.signals import cache_lookup
+
+MONTH_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def month_bounds(year, month):
+    """Return the first day of ``month`` and the first day of the next month."""
+    first = date(year, month, 1)
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, following
+
+
+def month_cache_key(year, month):
+    return f'todos:calendar:{year:04d}-{month:02d}'
+
+
+def build_month_summary(year, month):
+    """Aggregate per-day TODO counts for one month in a single GROUP BY.
+
+    Returns ``{date: {'total', 'resolved', 'active', 'priorities'}}`` where
+    ``priorities`` counts active TODOs per priority; days without TODOs are
+    omitted.
+    """
+    from .models import Todo
+
+    first, following = month_bounds(year, month)
+    rows = (
+        Todo.objects.filter(due_date__gte=first, due_date__lt=following)
+        .order_by()
+        .values('due_date', 'priority', 'is_resolved')
+        .annotate(count=Count('pk'))
+    )
+    summary = {}
+    for row in rows:
+        day = summary.setdefault(row['due_date'], {
+            'total': 0,
+            'resolved': 0,
+            'active': 0,
+            'priorities': {},
+        })
+        day['total'] += row['count']
+        if row['is_resolved']:
+            day['resolved'] += row['count']
+        else:
+            day['active'] += row['count']
+            day['priorities'][row['priority']] = day['priorities'].get(row['priority'], 0) + row['count']
+    return summary
+
+
+def get_month_summary(year, month):
+    """Return the cached summary for a month, building it on a miss."""
+    key = month_cache_key(year, month)
+    summary = cache.get(key)
+    cache_lookup.send(sender='calendar', hit=summary is not None)
+    if summary is None:
+        summary = build_month_summary(year, month)
+        cache.set(key, summary, MONTH_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_months(*due_dates):
+    """Drop the cached summaries of the months containing ``due_dates``."""
+    keys = {month_cache_key(d.year, d.month) for d in due_dates if d}
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,146 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .models import RecurrenceException, RecurrenceRule, Tag, Todo
+from .recurrence import invalidate_windows, series_ids
+from .schedule import invalidate_months
+from .tag_index import tag_index
+from .title_index import title_index
+
+
+@receiver(post_delete, sender=Todo)
+def update_ancestor_counts_on_delete(sender, instance, **kwargs):
+    """Remove a deleted TODO from its ancestors' rolled-up counters.
+
+    Runs once per deleted row, including rows removed by the cascade from a
+    deleted parent, so surviving ancestors lose exactly one per subtask.
+    """
+    Todo._adjust_ancestors(instance.path, -1, -int(instance.is_resolved))
+
+
+# ============================================
+# TAG INDEX
+# ============================================
+# Index updates are deferred to commit so rolled-back writes never leak in.
+
+@receiver(post_delete, sender=Todo)
+def remove_todo_from_tag_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(tag_index.discard_todo, instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+def register_tag_in_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(tag_index.register_tag, instance.pk, instance.name))
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_from_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(tag_index.discard_tag, instance.pk))
+
+
+@receiver(m2m_changed, sender=Todo.tags.through)
+def sync_tag_index(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mirror additions and removals on ``Todo.tags`` into the tag index."""
+    if action == 'pre_clear':
+        # pk_set is not provided for clears, so capture the links beforehand.
+        related = instance.todos if reverse else instance.tags
+        instance._cleared_tag_links = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_tag_links', set())
+        action = 'post_remove'
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        # instance is a Tag, pk_set holds TODO ids.
+        links = [(instance.pk, list(pk_set))]
+    else:
+        # instance is a TODO, pk_set holds tag ids.
+        links = [(tag_id, [instance.pk]) for tag_id in pk_set]
+    apply = tag_index.add if action == 'post_add' else tag_index.remove
+    for tag_id, todo_ids in links:
+        transaction.on_commit(partial(apply, tag_id, todo_ids))
+
+
+# ============================================
+# TITLE INDEX
+# ============================================
+
+@receiver(post_save, sender=Todo)
+def update_title_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        title_index.update, instance.pk, instance.title, instance.priority,
+        instance.created_at, not instance.is_resolved,
+    ))
+
+
+@receiver(post_delete, sender=Todo)
+def remove_todo_from_title_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(title_index.discard, instance.pk))
+
+
+# ============================================
+# CALENDAR CACHE
+# ============================================
+
+@receiver(post_save, sender=Todo)
+def invalidate_calendar_on_save(sender, instance, **kwargs):
+    """Drop the cached month(s) a saved TODO was or now is due in."""
+    previous = getattr(instance, '_persisted_values', None) or {}
+    transaction.on_commit(partial(invalidate_months, instance.due_date, previous.get('due_date')))
+
+
+@receiver(post_delete, sender=Todo)
+def invalidate_calendar_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_months, instance.due_date))
+
+
+# ============================================
+# RECURRENCE WINDOWS
+# ============================================
+# Windows are invalidated straight away (so this request sees its own write)
+# and again on commit (so a concurrent reader can't re-cache the old rows).
+
+def invalidate_recurrence(rules_changed=False):
+    invalidate_windows(rules_changed)
+    transaction.on_commit(partial(invalidate_windows, rules_changed))
+
+
+@receiver(post_save, sender=RecurrenceRule)
+@receiver(post_delete, sender=RecurrenceRule)
+def invalidate_recurrence_on_rule_change(sender, instance, **kwargs):
+    invalidate_recurrence(rules_changed=True)
+
+
+@receiver(post_save, sender=RecurrenceException)
+@receiver(post_delete, sender=RecurrenceException)
+def invalidate_recurrence_on_exception_change(sender, instance, **kwargs):
+    invalidate_recurrence()
+
+
+@receiver(post_delete, sender=Todo)
+def skip_deleted_occurrence(sender, instance, **kwargs):
+    """Keep a deleted occurrence from being computed again.
+
+    Recorded on commit: the series itself may be going away in the same
+    cascade, and then there is nothing left to skip.
+    """
+    if instance.occurrence_of_id and instance.occurrence_date:
+        transaction.on_commit(partial(RecurrenceException.record, instance.occurrence_of_id, instance.occurrence_date))
+
+
+@receiver(post_save, sender=Todo)
+@receiver(post_delete, sender=Todo)
+def invalidate_recurrence_on_todo_change(sender, instance, **kwargs):
+    """Expanded occurrences copy their series and skip stored ones, so both invalidate."""
+    if instance.occurrence_of_id or instance.pk in series_ids():
+        invalidate_recurrence()
+
+
+@receiver(m2m_changed, sender=Todo.tags.through)
+def invalidate_recurrence_on_tag_change(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and (reverse or instance.pk in series_ids()):
+        invalidate_recurrence()
@@ -0,0 +1,189 @@
+"""In-process inverted index from tags to TODO ids.
+
+Each tag maps to a bitset (a Python ``int``) in which bit ``n`` is set when
+the TODO with primary key ``n`` carries the tag. AND/OR queries over any
+number of tags are then a handful of big-integer ``&``/``|`` operations
+instead of one join per tag.
+
+The index is built lazily from the database on first use and then kept in
+sync by the receivers in ``todos.signals``. Every process holds its own copy;
+each committed write bumps a version stamp in the default cache, so other
+processes sharing that cache rebuild on their next query (see
+``todos.index_version``). ``manage.py rebuild_tag_index`` forces a rebuild
+everywhere.
+"""
+import threading
+
+from todo_project.signals import cache_lookup
+
+from .index_version import SharedVersion
+
+VERSION_CACHE_KEY = 'todos:tag-index:version'
+
+
+def bitset_from_ids(ids):
+    """Pack an iterable of non-negative ids into an int bitset."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for todo_id in ids:
+        buffer[todo_id >> 3] |= 1 << (todo_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def ids_from_bitset(bits):
+    """Unpack an int bitset into a sorted list of ids."""
+    binary = bin(bits)[:1:-1]  # least significant bit first, '0b' prefix dropped
+    ids = []
+    position = binary.find('1')
+    while position != -1:
+        ids.append(position)
+        position = binary.find('1', position + 1)
+    return ids
+
+
+class TagIndex:
+    """Thread-safe tag -> TODO id bitset index."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bitsets = None
+        self._tag_ids = {}
+        self._version = None
+        self.shared_version = SharedVersion(VERSION_CACHE_KEY)
+
+    @property
+    def is_built(self):
+        return self._bitsets is not None
+
+    def reset(self):
+        """Drop the in-memory index; it will be rebuilt on next use."""
+        with self._lock:
+            self._bitsets = None
+            self._tag_ids = {}
+
+    def rebuild(self):
+        """Rebuild the whole index from the database in two queries.
+
+        The version is read before the rows, and both under the lock that
+        incremental updates take. A write committed meanwhile is then either
+        in the rows already or applied on top once its version bump arrives;
+        updates are idempotent, so both at once is harmless.
+        """
+        from .models import Tag, Todo
+
+        with self._lock:
+            version = self.shared_version.current()
+            tag_ids = {name.lower(): pk for pk, name in Tag.objects.values_list('pk', 'name')}
+            members = {pk: [] for pk in tag_ids.values()}
+            rows = Todo.tags.through.objects.values_list('tag_id', 'todo_id')
+            for tag_id, todo_id in rows.iterator():
+                members.setdefault(tag_id, []).append(todo_id)
+
+            self._tag_ids = tag_ids
+            self._bitsets = {tag_id: bitset_from_ids(ids) for tag_id, ids in members.items()}
+            self._version = version
+        return self.stats()
+
+    def invalidate(self):
+        """Ask every process sharing the default cache to rebuild its index."""
+        self.shared_version.bump()
+        self.reset()
+
+    def _ensure_built(self):
+        current = self._bitsets is not None and self.shared_version.current() == self._version
+        cache_lookup.send(sender='tag_index', hit=current)
+        if not current:
+            self.rebuild()
+
+    def _apply(self, update, *args):
+        """Apply a committed write here and announce it to other processes."""
+        version = self.shared_version.bump()
+        with self._lock:
+            if self._bitsets is None:
+                return
+            if version == self._version + 1:
+                update(*args)
+                self._version = version
+            else:
+                # Another process wrote in between; rebuild on the next lookup.
+                self.reset()
+
+    def lookup(self, tags, match='all'):
+        """Return the sorted ids of TODOs tagged with all (or any) of ``tags``.
+
+        ``tags`` are tag names, matched case-insensitively. With
+        ``match='all'`` an unknown tag makes the result empty; with
+        ``match='any'`` unknown tags are ignored.
+        """
+        self._ensure_built()
+        with self._lock:
+            bitsets = [self._bitsets.get(self._tag_ids.get(name.lower())) for name in tags]
+        if match == 'any':
+            bits = 0
+            for tag_bits in bitsets:
+                bits |= tag_bits or 0
+        else:
+            if not bitsets or None in bitsets:
+                return []
+            bits = bitsets[0]
+            for tag_bits in bitsets[1:]:
+                bits &= tag_bits
+        return ids_from_bitset(bits)
+
+    def stats(self):
+        """Return a summary of the index for diagnostics."""
+        with self._lock:
+            bitsets = self._bitsets or {}
+            return {
+                'tags': len(bitsets),
+                'postings': sum(bits.bit_count() for bits in bitsets.values()),
+                'bytes': sum((bits.bit_length() + 7) // 8 for bits in bitsets.values()),
+            }
+
+    # ----------------------------------------
+    # Incremental maintenance, called once a write commits
+    # ----------------------------------------
+
+    def register_tag(self, tag_id, name):
+        self._apply(self._register_tag, tag_id, name)
+
+    def discard_tag(self, tag_id):
+        self._apply(self._discard_tag, tag_id)
+
+    def add(self, tag_id, todo_ids):
+        self._apply(self._add, tag_id, todo_ids)
+
+    def remove(self, tag_id, todo_ids):
+        self._apply(self._remove, tag_id, todo_ids)
+
+    def discard_todo(self, todo_id):
+        self._apply(self._discard_todo, todo_id)
+
+    def _register_tag(self, tag_id, name):
+        for key, pk in list(self._tag_ids.items()):
+            if pk == tag_id:
+                del self._tag_ids[key]
+        self._tag_ids[name.lower()] = tag_id
+        self._bitsets.setdefault(tag_id, 0)
+
+    def _discard_tag(self, tag_id):
+        self._bitsets.pop(tag_id, None)
+        self._tag_ids = {key: pk for key, pk in self._tag_ids.items() if pk != tag_id}
+
+    def _add(self, tag_id, todo_ids):
+        self._bitsets[tag_id] = self._bitsets.get(tag_id, 0) | bitset_from_ids(todo_ids)
+
+    def _remove(self, tag_id, todo_ids):
+        if tag_id in self._bitsets:
+            self._bitsets[tag_id] &= ~bitset_from_ids(todo_ids)
+
+    def _discard_todo(self, todo_id):
+        bit = 1 << todo_id
+        for tag_id, bits in self._bitsets.items():
+            if bits & bit:
+                self._bitsets[tag_id] = bits ^ bit
+
+
+tag_index = TagIndex()
@@ -1,9 +1,23 @@
-from django.test import TestCase, Client
+from io import StringIO
+import threading
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import Todo
+from .models import RecurrenceException, RecurrenceRule, Tag, Todo
 from .forms import TodoForm
+from . import ranking
+from .recurrence import Occurrence, expand_window, occurrence_dates, sort_like
+from .tag_index import TagIndex, bitset_from_ids, ids_from_bitset, tag_index
+from .title_index import MEMO_SIZE, TitleIndex, title_index
 
 
 # ============================================
@@ -481,3 +495,1059 @@ class TodoIntegrationTest(TestCase):
 
         # Check it's no longer overdue
         self.assertFalse(overdue_todo.is_overdue())
+
+
+# ============================================
+# SUBTASK TREE TESTS
+# ============================================
+
+class TodoSubtaskTreeTest(TestCase):
+    """Test cases for materialized-path subtasks and rolled-up counts"""
+
+    def setUp(self):
+        self.root = Todo.objects.create(title='Release')
+        self.child = Todo.objects.create(title='Write notes', parent=self.root)
+        self.grandchild = Todo.objects.create(title='Draft changelog', parent=self.child)
+
+    def refresh(self, *todos):
+        for todo in todos:
+            todo.refresh_from_db()
+
+    def test_paths_are_materialized(self):
+        """Test each TODO stores the ids of its ancestors"""
+        self.assertEqual(self.root.path, '')
+        self.assertEqual(self.child.ancestor_ids, [self.root.pk])
+        self.assertEqual(self.grandchild.ancestor_ids, [self.root.pk, self.child.pk])
+        self.assertEqual(self.grandchild.depth, 2)
+
+    def test_descendants_in_one_query(self):
+        """Test the whole subtree is fetched in a single query"""
+        Todo.objects.create(title='Unrelated')
+        with self.assertNumQueries(1):
+            descendants = list(self.root.get_descendants())
+        self.assertEqual(descendants, [self.child, self.grandchild])
+
+    def test_counts_roll_up_on_create(self):
+        """Test creating subtasks increments every ancestor"""
+        self.refresh(self.root, self.child)
+        self.assertEqual(self.root.subtask_count, 2)
+        self.assertEqual(self.child.subtask_count, 1)
+        self.assertEqual(self.root.subtask_done_count, 0)
+
+    def test_counts_roll_up_on_resolve(self):
+        """Test resolving and reopening a subtask adjusts done counts"""
+        self.grandchild.is_resolved = True
+        self.grandchild.save()
+        self.refresh(self.root, self.child)
+        self.assertEqual(self.root.subtask_done_count, 1)
+        self.assertEqual(self.child.subtask_done_count, 1)
+
+        self.grandchild.is_resolved = False
+        self.grandchild.save()
+        self.refresh(self.root)
+        self.assertEqual(self.root.subtask_done_count, 0)
+
+    def test_stale_instance_does_not_clobber_counts(self):
+        """Test saving an outdated parent instance keeps its counters"""
+        stale_root = Todo.objects.get(pk=self.root.pk)
+        Todo.objects.create(title='Tag release', parent=self.root)
+        stale_root.title = 'Release 2.0'
+        stale_root.save()
+        self.refresh(self.root)
+        self.assertEqual(self.root.subtask_count, 3)
+
+    def test_counts_roll_up_on_delete(self):
+        """Test deleting a subtree removes all of its nodes from ancestors"""
+        self.grandchild.is_resolved = True
+        self.grandchild.save()
+        self.child.delete()
+        self.refresh(self.root)
+        self.assertEqual(self.root.subtask_count, 0)
+        self.assertEqual(self.root.subtask_done_count, 0)
+
+    def test_move_subtree(self):
+        """Test reparenting moves the subtree and its counts"""
+        other = Todo.objects.create(title='Other project')
+        self.child.parent = other
+        self.child.save()
+        self.refresh(self.root, other, self.grandchild)
+        self.assertEqual(self.root.subtask_count, 0)
+        self.assertEqual(other.subtask_count, 2)
+        self.assertEqual(self.grandchild.ancestor_ids, [other.pk, self.child.pk])
+
+    def test_cannot_nest_under_own_subtask(self):
+        """Test the form rejects moving a TODO under its descendant"""
+        form = TodoForm(
+            data={'title': 'Release', 'priority': 'medium', 'parent': self.grandchild.pk},
+            instance=self.root,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('parent', form.errors)
+
+    def test_cannot_move_deep_subtree_past_max_depth(self):
+        """Test the depth limit counts the levels below the TODO being moved"""
+        def chain(title, length):
+            todos = [Todo.objects.create(title=f'{title} 0')]
+            for level in range(1, length):
+                todos.append(Todo.objects.create(title=f'{title} {level}', parent=todos[-1]))
+            return todos
+
+        upper, lower = chain('Upper', 15), chain('Lower', 15)
+        self.assertEqual(lower[0].subtree_height(), 14)
+        form = TodoForm(data={'title': 'Lower 0', 'priority': 'medium', 'parent': upper[-1].pk}, instance=lower[0])
+        self.assertFalse(form.is_valid())
+        self.assertIn('parent', form.errors)
+
+        # The same move fits once the subtree is shallow enough.
+        lower[5].delete()
+        lower[0].refresh_from_db()
+        self.assertEqual(lower[0].subtree_height(), 4)
+        form = TodoForm(data={'title': 'Lower 0', 'priority': 'medium', 'parent': upper[-1].pk}, instance=lower[0])
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(Todo.objects.get(pk=lower[4].pk).depth, Todo.MAX_DEPTH - 1)
+
+    def test_list_view_shows_progress_without_per_card_queries(self):
+        """Test rolled-up counts render without extra queries per card"""
+        self.grandchild.is_resolved = True
+        self.grandchild.save()
+        self.client.get(reverse('todo-list'))  # warm the recurrence window cache
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('todo-list'))
+        self.assertContains(response, '1 of 2 done')
+        self.assertContains(response, 'Subtask of')
+
+    def test_detail_view_lists_subtasks(self):
+        """Test detail view shows the subtree and progress"""
+        response = self.client.get(reverse('todo-detail', args=[self.root.pk]))
+        self.assertEqual(response.context['subtasks'], [self.child, self.grandchild])
+        self.assertContains(response, '0 of 2 done')
+
+    def test_create_view_prefills_parent(self):
+        """Test ?parent= preselects the parent on the create form"""
+        response = self.client.get(reverse('todo-create') + f'?parent={self.root.pk}')
+        self.assertEqual(response.context['form'].initial['parent'], str(self.root.pk))
+
+
+# ============================================
+# TAG TESTS
+# ============================================
+
+class TagIndexTest(TestCase):
+    """Test cases for tags and the in-memory tag index"""
+
+    def setUp(self):
+        tag_index.reset()
+        self.work = Tag.objects.create(name='work')
+        self.urgent = Tag.objects.create(name='urgent')
+        self.home = Tag.objects.create(name='home')
+        self.report = Todo.objects.create(title='Write report')
+        self.report.tags.add(self.work, self.urgent)
+        self.email = Todo.objects.create(title='Answer email')
+        self.email.tags.add(self.work)
+        self.dishes = Todo.objects.create(title='Dishes', is_resolved=True)
+        self.dishes.tags.add(self.home, self.urgent)
+
+    def tearDown(self):
+        tag_index.reset()
+
+    def test_bitset_round_trip(self):
+        """Test ids survive packing into and out of a bitset"""
+        ids = [0, 3, 8, 9, 1000]
+        self.assertEqual(ids_from_bitset(bitset_from_ids(ids)), ids)
+        self.assertEqual(ids_from_bitset(0), [])
+
+    def test_lookup_all(self):
+        """Test AND queries intersect tag postings"""
+        self.assertEqual(tag_index.lookup(['work', 'urgent']), [self.report.pk])
+        self.assertEqual(tag_index.lookup(['WORK']), [self.report.pk, self.email.pk])
+        self.assertEqual(tag_index.lookup(['work', 'missing']), [])
+
+    def test_lookup_any(self):
+        """Test OR queries union tag postings"""
+        self.assertEqual(
+            tag_index.lookup(['home', 'work'], match='any'),
+            [self.report.pk, self.email.pk, self.dishes.pk],
+        )
+
+    def test_index_follows_tag_changes(self):
+        """Test signals keep a built index in sync after commit"""
+        tag_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.email.tags.add(self.urgent)
+            self.report.tags.remove(self.work)
+        self.assertEqual(tag_index.lookup(['work', 'urgent']), [self.email.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.urgent.todos.clear()
+        self.assertEqual(tag_index.lookup(['urgent'], match='any'), [])
+
+    def test_index_follows_deletes_and_renames(self):
+        """Test deleting TODOs and renaming tags update the index"""
+        tag_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.delete()
+            self.home.name = 'house'
+            self.home.save()
+        self.assertEqual(tag_index.lookup(['work']), [self.email.pk])
+        self.assertEqual(tag_index.lookup(['house']), [self.dishes.pk])
+        self.assertEqual(tag_index.lookup(['home']), [])
+
+    def test_writes_reach_other_processes(self):
+        """Test an index built in another process rebuilds after a committed write"""
+        other = TagIndex()  # stands in for a second worker sharing the cache
+        tag_index.rebuild()
+        other.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.email.tags.add(self.urgent)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_index.lookup(['work', 'urgent']), [self.report.pk, self.email.pk])
+        with self.assertNumQueries(2):
+            self.assertEqual(other.lookup(['work', 'urgent']), [self.report.pk, self.email.pk])
+
+    def test_missed_write_forces_rebuild(self):
+        """Test a process that missed another process's write rebuilds instead of patching"""
+        tag_index.rebuild()
+        # Another worker commits a link this process never hears about.
+        Todo.tags.through.objects.create(todo=self.email, tag=self.home)
+        tag_index.shared_version.bump()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.tags.remove(self.urgent)
+        self.assertEqual(tag_index.lookup(['home'], match='any'), [self.email.pk, self.dishes.pk])
+        self.assertEqual(tag_index.lookup(['urgent']), [self.dishes.pk])
+
+    def test_updates_are_idempotent_over_a_rebuild(self):
+        """Test a write already in the rebuilt rows can be applied again safely"""
+        Todo.tags.through.objects.create(todo=self.email, tag=self.urgent)
+        tag_index.rebuild()
+        tag_index.add(self.urgent.pk, [self.email.pk])
+        self.assertEqual(tag_index.lookup(['urgent']), [self.report.pk, self.email.pk, self.dishes.pk])
+
+    def test_tag_names_are_unique_ignoring_case(self):
+        """Test 'Work' can't be created next to 'work'"""
+        with self.assertRaises(ValidationError):
+            Tag(name='WORK').full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tag.objects.create(name='Work')
+
+    def test_list_view_filters_by_tags_and_status(self):
+        """Test combining tag AND filter with the active filter"""
+        response = self.client.get(reverse('todo-list') + '?filter=active&tag=urgent')
+        self.assertEqual(list(response.context['todos']), [self.report])
+
+        response = self.client.get(reverse('todo-list') + '?tag=work&tag=home&match=any')
+        self.assertEqual(len(response.context['todos']), 3)
+
+    def test_list_view_prefetches_tags(self):
+        """Test tag chips render without extra queries per card"""
+        tag_index.rebuild()
+        self.client.get(reverse('todo-list'))  # warm the recurrence window cache
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('todo-list'))
+        self.assertContains(response, '#urgent')
+
+    def test_rebuild_command(self):
+        """Test the management command rebuilds the index"""
+        out = StringIO()
+        call_command('rebuild_tag_index', stdout=out)
+        self.assertIn('3 tags, 5 postings', out.getvalue())
+        self.assertTrue(tag_index.is_built)
+
+
+class TitleIndexTest(TestCase):
+    """Test cases for title autocomplete and the in-memory title index"""
+
+    def setUp(self):
+        title_index.reset()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.old = Todo.objects.create(title='Buy milk', priority='low')
+        self.urgent = Todo.objects.create(title='Buy  BREAD', priority='high')
+        self.new = Todo.objects.create(title='Buy eggs', priority='low')
+        self.done = Todo.objects.create(title='Buy stamps', priority='high', is_resolved=True)
+        self.other = Todo.objects.create(title='Call the bank')
+
+    def tearDown(self):
+        title_index.reset()
+
+    def titles(self, prefix, limit=8):
+        return [title for _, title, _ in title_index.search(prefix, limit)]
+
+    def test_prefix_matches_ranked_by_priority_then_recency(self):
+        """Test only active titles with the prefix match, highest priority and newest first"""
+        self.assertEqual(self.titles('buy'), ['Buy  BREAD', 'Buy eggs', 'Buy milk'])
+        self.assertEqual(self.titles('  BUY   b'), ['Buy  BREAD'])
+        self.assertEqual(self.titles('buy', limit=2), ['Buy  BREAD', 'Buy eggs'])
+        self.assertEqual(self.titles('zzz'), [])
+        self.assertEqual(self.titles(''), [])
+
+    def test_duplicate_titles_are_suggested_once(self):
+        """Test a title shared by several TODOs appears once, as its best-ranked TODO"""
+        copy = Todo.objects.create(title='buy milk', priority='high')
+        results = title_index.search('buy m')
+        self.assertEqual(results, [(copy.pk, 'buy milk', 'high')])
+
+    def test_memo_is_bounded(self):
+        """Test only short prefixes are memoized, and only up to the LRU size"""
+        self.titles('buy')
+        self.assertEqual(len(title_index._memo), 0)
+        for i in range(MEMO_SIZE + 50):
+            self.titles(chr(0x4e00 + i))
+        self.titles('b')
+        self.assertEqual(len(title_index._memo), MEMO_SIZE)
+        self.assertIn(('b', 8), title_index._memo)
+        self.assertNotIn(('\u4e00', 8), title_index._memo)
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test signals keep a built index in sync after commit"""
+        title_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            Todo.objects.create(title='Buy flowers', priority='medium')
+            self.urgent.is_resolved = True
+            self.urgent.save()
+            self.done.is_resolved = False
+            self.done.save()
+            self.old.title = 'Sell milk'
+            self.old.save()
+            self.new.delete()
+        self.assertEqual(self.titles('buy'), ['Buy stamps', 'Buy flowers'])
+        self.assertEqual(self.titles('sell'), ['Sell milk'])
+
+    def test_writes_reach_other_processes(self):
+        """Test an index built in another process rebuilds after a committed write"""
+        other = TitleIndex()  # stands in for a second worker sharing the cache
+        title_index.rebuild()
+        other.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            Todo.objects.create(title='Buy flowers', priority='high')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('buy f'), ['Buy flowers'])
+        with self.assertNumQueries(1):
+            self.assertEqual([title for _, title, _ in other.search('buy f')], ['Buy flowers'])
+
+    def test_missed_write_forces_rebuild(self):
+        """Test a process that missed another process's write rebuilds instead of patching"""
+        title_index.rebuild()
+        Todo.objects.filter(pk=self.other.pk).update(title='Buy a bank')  # written by another worker
+        title_index.shared_version.bump()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.old.delete()
+        self.assertEqual(self.titles('buy'), ['Buy  BREAD', 'Buy a bank', 'Buy eggs'])
+
+    def test_rolled_back_writes_are_not_indexed(self):
+        """Test the index only changes once the transaction commits"""
+        title_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=False):
+            Todo.objects.create(title='Buy uncommitted')
+        self.assertEqual(self.titles('buy u'), [])
+
+    def test_endpoint(self):
+        """Test the autocomplete endpoint answers from memory after the first build"""
+        url = reverse('todo-autocomplete')
+        self.client.get(url, {'q': 'b'})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'buy', 'limit': '1'})
+        self.assertEqual(response.json(), {
+            'query': 'buy',
+            'results': [{
+                'id': self.urgent.pk,
+                'title': 'Buy  BREAD',
+                'priority': 'high',
+                'url': reverse('todo-detail', args=[self.urgent.pk]),
+            }],
+        })
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.assertEqual(len(self.client.get(url, {'q': 'buy', 'limit': '500'}).json()['results']), 3)
+
+    def test_endpoint_clamps_limit(self):
+        """Test malformed or out-of-range limits fall back or clamp instead of failing"""
+        url = reverse('todo-autocomplete')
+        for limit, expected in [('²', 3), ('abc', 3), ('0', 1), ('-5', 1), (' 2 ', 2)]:
+            response = self.client.get(url, {'q': 'buy', 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), expected, limit)
+
+    def test_form_widget_points_at_endpoint(self):
+        """Test the TODO form's title input is wired to the autocomplete endpoint"""
+        response = self.client.get(reverse('todo-create'))
+        self.assertContains(response, f'data-autocomplete-url="{reverse("todo-autocomplete")}"')
+
+    def test_rebuild_command(self):
+        """Test the management command rebuilds the index"""
+        out = StringIO()
+        call_command('rebuild_title_index', stdout=out)
+        self.assertIn('4 active TODOs, 4 distinct titles', out.getvalue())
+        self.assertTrue(title_index.is_built)
+
+
+class TodoConcurrentMoveTest(TransactionTestCase):
+    """Test cases for reorders racing each other on separate connections"""
+
+    fragment = {'HTTP_ACCEPT': 'application/json'}
+
+    def setUp(self):
+        self.a, self.b = Todo.objects.create(title='A'), Todo.objects.create(title='B')
+        self.moved = [Todo.objects.create(title=f'Moved {i}') for i in range(6)]
+
+    def post_move(self, todo, barrier, statuses):
+        try:
+            barrier.wait()
+            response = Client().post(
+                reverse('todo-move', args=[todo.pk]), {'before': self.a.pk, 'after': self.b.pk}, **self.fragment
+            )
+            statuses[todo.pk] = response.status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_moves_into_same_gap(self):
+        """Test simultaneous moves into one gap each succeed or get a 409, never a 500"""
+        barrier = threading.Barrier(len(self.moved))
+        statuses = {}
+        threads = [threading.Thread(target=self.post_move, args=(todo, barrier, statuses)) for todo in self.moved]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(statuses), len(self.moved))
+        self.assertLessEqual(set(statuses.values()), {200, 409})
+        self.assertIn(200, statuses.values())
+        ranks = list(Todo.objects.values_list('rank', flat=True))
+        self.assertEqual(len(set(ranks)), len(ranks))
+        moved_in = [pk for pk, status in statuses.items() if status == 200]
+        order = list(Todo.objects.order_by('rank', 'pk').values_list('pk', flat=True))
+        self.assertEqual(order[0], self.a.pk)
+        self.assertCountEqual(order[1:1 + len(moved_in)], moved_in)
+
+    def test_move_blocked_by_another_writer_is_a_conflict(self):
+        """Test a move that can't get the write lock reports 409 instead of failing"""
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_write_lock():
+            try:
+                with transaction.atomic():
+                    Todo.objects.filter(pk=self.b.pk).update(title='B (editing)')
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        self.addCleanup(holder.join)
+        self.addCleanup(release.set)
+        self.assertTrue(locked.wait(10))
+        response = self.client.post(
+            reverse('todo-move', args=[self.moved[0].pk]), {'before': self.a.pk}, **self.fragment
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('try again', response.json()['error'])
+
+    def test_only_moves_begin_immediate(self):
+        """Test moves take SQLite's write lock up front while other transactions stay deferred"""
+        with CaptureQueriesContext(connection) as queries:
+            ranking.move(self.moved[0].pk, before=self.a.pk)
+            with transaction.atomic():
+                Todo.objects.filter(pk=self.b.pk).update(title='B (edited)')
+        begins = [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+
+
+# ============================================
+# CALENDAR TESTS
+# ============================================
+
+class TodoCalendarViewTest(TestCase):
+    """Test cases for the month calendar and agenda views"""
+
+    def setUp(self):
+        cache.clear()
+        self.day = date(2030, 5, 14)
+        Todo.objects.create(title='High one', priority='high', due_date=self.day)
+        Todo.objects.create(title='High two', priority='high', due_date=self.day)
+        Todo.objects.create(title='Done', priority='low', due_date=self.day, is_resolved=True)
+        Todo.objects.create(title='Next month', due_date=date(2030, 6, 1))
+        self.url = reverse('todo-calendar-month', args=[2030, 5])
+
+    def tearDown(self):
+        cache.clear()
+
+    def find_cell(self, response, day):
+        for week in response.context['weeks']:
+            for cell in week:
+                if cell['date'] == day:
+                    return cell
+
+    def test_calendar_counts_per_day(self):
+        """Test per-day counts are split by priority and resolved state"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        summary = self.find_cell(response, self.day)['summary']
+        self.assertEqual(summary['total'], 3)
+        self.assertEqual(summary['resolved'], 1)
+        self.assertEqual(summary['priorities'], {'high': 2})
+        self.assertIsNone(self.find_cell(response, date(2030, 6, 1))['summary'])
+
+    def test_calendar_is_one_query_then_cached(self):
+        """Test the month is one aggregate query, then served from cache"""
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_cache_invalidated_for_old_and_new_month(self):
+        """Test moving a due date drops both affected months"""
+        self.client.get(self.url)
+        self.client.get(reverse('todo-calendar-month', args=[2030, 6]))
+        todo = Todo.objects.get(title='Next month')
+        with self.captureOnCommitCallbacks(execute=True):
+            todo.due_date = self.day
+            todo.save()
+        response = self.client.get(self.url)
+        self.assertEqual(self.find_cell(response, self.day)['summary']['total'], 4)
+        response = self.client.get(reverse('todo-calendar-month', args=[2030, 6]))
+        self.assertIsNone(self.find_cell(response, date(2030, 6, 1))['summary'])
+
+    def test_cache_kept_for_unrelated_month(self):
+        """Test writes outside a month leave its cache alone"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Todo.objects.create(title='Far away', due_date=date(2031, 1, 1))
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_invalid_month_returns_404(self):
+        """Test out-of-range months are rejected"""
+        response = self.client.get(reverse('todo-calendar-month', args=[2030, 13]))
+        self.assertEqual(response.status_code, 404)
+        for year, month in [(1, 1), (9999, 12)]:
+            response = self.client.get(reverse('todo-calendar-month', args=[year, month]))
+            self.assertEqual(response.status_code, 404)
+        for year, month in [(2, 1), (9998, 12)]:
+            response = self.client.get(reverse('todo-calendar-month', args=[year, month]))
+            self.assertEqual(response.status_code, 200)
+
+    def test_agenda_loads_one_day(self):
+        """Test the agenda lists only the requested day"""
+        response = self.client.get(reverse('todo-agenda') + '?start=2030-05-14&days=1')
+        self.assertEqual(len(response.context['todos']), 3)
+        self.assertContains(response, 'High one')
+        self.assertNotContains(response, 'Next month')
+
+    def test_agenda_start_near_end_of_calendar(self):
+        """Test a start too close to date.max falls back to today instead of overflowing"""
+        for start in ['9999-12-30', '9999-12-31']:
+            response = self.client.get(reverse('todo-agenda') + f'?start={start}&days=62')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['start'], timezone.now().date())
+        response = self.client.get(reverse('todo-agenda') + '?start=9999-10-30&days=62')
+        self.assertEqual(response.context['end'], date(9999, 12, 30))
+
+
+# ============================================
+# SESSION CLEANUP TESTS
+# ============================================
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+class PurgeSessionsCommandTest(TestCase):
+    """Test cases for the purge_sessions command"""
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        self.sessions = Session.objects
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('purge_sessions', *args, stdout=out)
+        return out.getvalue()
+
+    def test_purges_expired_in_batches(self):
+        """Test only expired rows go by default"""
+        output = self.run_command('--batch-size', '2')
+        self.assertIn('Deleted 5', output)
+        self.assertEqual(list(self.sessions.values_list('session_key', flat=True)), ['live'])
+
+    def test_dry_run(self):
+        """Test dry run deletes nothing"""
+        self.assertIn('6 session rows', self.run_command('--all', '--dry-run'))
+        self.assertEqual(self.sessions.count(), 6)
+
+    def test_all_refused_while_sessions_use_database(self):
+        """Test --all is refused when sessions are still database-backed"""
+        for engine in ('django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db'):
+            with override_settings(SESSION_ENGINE=engine):
+                with self.assertRaises(CommandError):
+                    self.run_command('--all')
+        self.assertEqual(self.sessions.count(), 6)
+        self.run_command('--all')
+        self.assertEqual(self.sessions.count(), 0)
+
+
+# ============================================
+# FRAGMENT RESPONSE TESTS
+# ============================================
+
+class TodoFragmentResponseTest(TestCase):
+    """Test cases for partial-page responses to toggle/create/update/delete"""
+
+    fragment = {'HTTP_ACCEPT': 'application/json'}
+
+    def setUp(self):
+        for i in range(19):
+            Todo.objects.create(title=f'Filler {i}')
+        self.todo = Todo.objects.create(title='Fragment TODO')
+
+    def test_toggle_returns_card_and_counts(self):
+        """Test toggling returns only the updated card and counters"""
+        response = self.client.post(reverse('todo-toggle', args=[self.todo.pk]), **self.fragment)
+        data = response.json()
+        self.assertEqual(data['id'], self.todo.pk)
+        self.assertFalse(data['removed'])
+        self.assertIn(f'id="todo-{self.todo.pk}"', data['html'])
+        self.assertIn('Reopen', data['html'])
+        self.assertEqual(data['counts'], {'total': 20, 'active': 19, 'completed': 1})
+        self.assertEqual(data['message'], 'TODO marked as completed!')
+
+    def test_toggle_removes_card_hidden_by_filter(self):
+        """Test a card leaving the active filter is reported as removed"""
+        url = reverse('todo-toggle', args=[self.todo.pk]) + '?filter=active'
+        data = self.client.post(url, HTTP_X_FRAGMENT='1').json()
+        self.assertTrue(data['removed'])
+        self.assertEqual(data['html'], '')
+
+    def test_toggle_removes_card_hidden_by_tag_filter(self):
+        """Test a card outside the selected tags is reported as removed"""
+        tag_index.reset()
+        self.addCleanup(tag_index.reset)
+        work = Tag.objects.create(name='work')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.todo.tags.add(work)
+        url = reverse('todo-toggle', args=[self.todo.pk])
+
+        data = self.client.post(url + '?tag=Work', **self.fragment).json()
+        self.assertFalse(data['removed'])
+        data = self.client.post(url + '?tag=home', **self.fragment).json()
+        self.assertTrue(data['removed'])
+        data = self.client.post(url + '?tag=home&tag=work&match=any', **self.fragment).json()
+        self.assertFalse(data['removed'])
+
+    def test_fragment_is_much_cheaper_than_full_page_flow(self):
+        """Test the fragment costs fewer queries and far fewer bytes than redirect + list"""
+        url = reverse('todo-toggle', args=[self.todo.pk])
+        with CaptureQueriesContext(connection) as full_queries:
+            full = self.client.get(url, follow=True)
+        with CaptureQueriesContext(connection) as fragment_queries:
+            fragment = self.client.post(url, **self.fragment)
+        self.assertLess(len(fragment_queries), len(full_queries))
+        self.assertLess(len(fragment.content) * 10, len(full.content))
+
+    def test_create_returns_card(self):
+        """Test creating via fragment returns the new card"""
+        response = self.client.post(reverse('todo-create'), {'title': 'Quick', 'priority': 'high'}, **self.fragment)
+        data = response.json()
+        self.assertIn('Quick', data['html'])
+        self.assertEqual(data['counts']['total'], 21)
+
+    def test_create_errors_as_json(self):
+        """Test invalid fragment submissions return errors"""
+        response = self.client.post(reverse('todo-create'), {'title': ''}, **self.fragment)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json()['errors'])
+
+    def test_update_returns_card(self):
+        """Test updating via fragment returns the updated card"""
+        response = self.client.post(
+            reverse('todo-update', args=[self.todo.pk]),
+            {'title': 'Renamed', 'priority': 'low'},
+            **self.fragment,
+        )
+        self.assertIn('Renamed', response.json()['html'])
+
+    def test_delete_returns_removal(self):
+        """Test deleting via fragment reports the removal and counters"""
+        response = self.client.post(reverse('todo-delete', args=[self.todo.pk]), **self.fragment)
+        data = response.json()
+        self.assertTrue(data['removed'])
+        self.assertEqual(data['counts']['total'], 19)
+        self.assertFalse(Todo.objects.filter(pk=self.todo.pk).exists())
+
+    def test_full_page_delete_shows_message(self):
+        """Test the redirect flow still flashes the delete message"""
+        response = self.client.post(reverse('todo-delete', args=[self.todo.pk]), follow=True)
+        self.assertContains(response, 'TODO deleted successfully!')
+
+    def test_list_renders_shared_card_template(self):
+        """Test the list page renders cards from the shared sub-template"""
+        response = self.client.get(reverse('todo-list'))
+        self.assertTemplateUsed(response, 'todos/_todo_card.html')
+        self.assertContains(response, 'data-fragment-action="toggle"')
+
+
+# ============================================
+# RECURRENCE TESTS
+# ============================================
+
+class TodoRecurrenceTest(TestCase):
+    """Test cases for recurring TODOs and lazily expanded occurrences"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = timezone.now().date()
+        self.standup = Todo.objects.create(title='Standup', priority='high', due_date=self.today)
+        self.rule = RecurrenceRule.objects.create(todo=self.standup, frequency='daily')
+
+    def window(self):
+        return expand_window(self.today, self.today + timedelta(days=14))
+
+    def test_occurrence_dates(self):
+        """Test daily, weekly and monthly expansion within a window"""
+        anchor = date(2026, 1, 31)
+        self.assertEqual(
+            list(occurrence_dates(anchor, 'daily', 2, None, date(2026, 2, 3), date(2026, 2, 8))),
+            [date(2026, 2, 4), date(2026, 2, 6)],
+        )
+        self.assertEqual(
+            list(occurrence_dates(anchor, 'weekly', 1, date(2026, 2, 14), date(2026, 2, 1), date(2026, 3, 1))),
+            [date(2026, 2, 7), date(2026, 2, 14)],
+        )
+        # Monthly series clamp to short months but keep the anchor's day afterwards.
+        self.assertEqual(
+            list(occurrence_dates(anchor, 'monthly', 1, None, date(2026, 1, 1), date(2026, 4, 1))),
+            [date(2026, 2, 28), date(2026, 3, 31)],
+        )
+
+    def test_window_excludes_anchor_and_stored_occurrences(self):
+        """Test the series TODO and already stored occurrences are not expanded"""
+        days = [o.due_date for o in self.window()]
+        self.assertEqual(days[0], self.today + timedelta(days=1))
+        self.assertEqual(len(days), 13)
+
+        self.rule.materialize(self.today + timedelta(days=1))
+        days = [o.due_date for o in self.window()]
+        self.assertNotIn(self.today + timedelta(days=1), days)
+        self.assertEqual(len(days), 12)
+
+    def test_window_is_cached(self):
+        """Test a second expansion of the same window hits no tables"""
+        self.window()
+        with self.assertNumQueries(0):
+            self.window()
+
+    def test_list_merges_occurrences_in_list_order(self):
+        """Test pages of the list follow Meta.ordering across stored rows and occurrences"""
+        for i in range(15):
+            Todo.objects.create(
+                title=f'Task {i}',
+                priority=['low', 'medium', 'high'][i % 3],
+                due_date=self.today + timedelta(days=i % 5),
+            )
+        expected = sort_like(list(Todo.objects.all()) + self.window(), Todo._meta.ordering)
+
+        first = self.client.get(reverse('todo-list'))
+        second = self.client.get(reverse('todo-list') + '?page=2')
+        self.assertEqual(first.context['paginator'].count, 16 + 13)
+        self.assertEqual(list(first.context['todos']) + list(second.context['todos']), expected)
+        self.assertTemplateUsed(first, 'todos/_occurrence_card.html')
+
+    def test_list_with_more_occurrences_than_result_columns(self):
+        """Test positions are counted in batches once occurrences outnumber SQLite's column limit"""
+        for i in range(160):
+            series = Todo.objects.create(title=f'Daily {i}', priority='low', due_date=self.today)
+            RecurrenceRule.objects.create(todo=series, frequency='daily')
+        occurrences = self.window()
+        self.assertGreater(len(occurrences), 2000)
+        expected = sort_like(list(Todo.objects.all()) + occurrences, Todo._meta.ordering)
+
+        first = self.client.get(reverse('todo-list'))
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.context['paginator'].count, len(expected))
+        second = self.client.get(reverse('todo-list') + '?page=2')
+        self.assertEqual(list(first.context['todos']) + list(second.context['todos']), expected[:40])
+        last = self.client.get(reverse('todo-list') + '?page=last')
+        self.assertEqual(list(last.context['todos']), expected[last.context['page_obj'].start_index() - 1:])
+
+    def test_list_occurrences_cost_one_query_on_cached_window(self):
+        """Test occurrences only add the position aggregate once the window is cached"""
+        self.client.get(reverse('todo-list'))
+        with self.assertNumQueries(6):
+            self.client.get(reverse('todo-list'))
+
+    def test_list_filters_apply_to_occurrences(self):
+        """Test completed and tag filters hide occurrences that don't match"""
+        response = self.client.get(reverse('todo-list') + '?filter=completed')
+        self.assertEqual(list(response.context['todos']), [])
+
+        tag_index.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.standup.tags.add(Tag.objects.create(name='team'))
+        response = self.client.get(reverse('todo-list') + '?tag=team')
+        self.assertEqual(len(response.context['todos']), 14)
+        self.assertEqual(response.context['todos'][1].tag_names, ['team'])
+        response = self.client.get(reverse('todo-list') + '?tag=other')
+        self.assertEqual(list(response.context['todos']), [])
+
+    def test_complete_materializes_occurrence(self):
+        """Test completing an occurrence stores exactly one resolved row"""
+        day = self.today + timedelta(days=2)
+        url = reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()])
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse('todo-list'))
+        self.client.post(url)
+
+        stored = Todo.objects.get(occurrence_of=self.rule)
+        self.assertEqual(stored.occurrence_date, day)
+        self.assertEqual(stored.due_date, day)
+        self.assertEqual(stored.title, 'Standup')
+        self.assertTrue(stored.is_resolved)
+        self.assertNotIn(day, [o.due_date for o in self.window()])
+
+    def test_complete_fragment_replaces_occurrence_card(self):
+        """Test the fragment response names the occurrence card it replaces"""
+        day = self.today + timedelta(days=3)
+        url = reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()])
+        data = self.client.post(url, HTTP_ACCEPT='application/json').json()
+        self.assertEqual(data['replaces'], Occurrence(self.rule.pk, self.standup.pk, day, '', '', '', [], None).dom_id)
+        self.assertIn(f'id="todo-{data["id"]}"', data['html'])
+
+    def test_deleted_occurrence_stays_deleted(self):
+        """Test deleting a stored occurrence skips its date instead of computing it again"""
+        day = self.today + timedelta(days=2)
+        self.client.post(reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()]))
+        stored = Todo.objects.get(occurrence_of=self.rule, occurrence_date=day)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('todo-delete', args=[stored.pk]))
+
+        self.assertTrue(self.rule.exceptions.filter(date=day).exists())
+        self.assertNotIn(day, [o.due_date for o in self.window()])
+        self.assertEqual(len(self.window()), 12)
+        response = self.client.post(reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleting_series_with_occurrences_records_nothing(self):
+        """Test removing a whole series doesn't try to skip dates of a rule that is gone"""
+        day = self.today + timedelta(days=2)
+        self.client.post(reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.delete()
+            Todo.objects.filter(title='Standup').delete()
+        self.assertFalse(RecurrenceException.objects.exists())
+
+    def test_edit_form_stores_nothing_until_submitted(self):
+        """Test opening an occurrence's form is read-only and a valid POST stores it"""
+        day = self.today + timedelta(days=1)
+        url = reverse('todo-occurrence-edit', args=[self.rule.pk, day.isoformat()])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="Standup"')
+        self.assertContains(response, 'Edit TODO')
+        self.assertNotIn('repeat', response.context['form'].fields)
+        self.assertFalse(Todo.objects.filter(occurrence_of=self.rule).exists())
+
+        response = self.client.post(url, {'title': 'Long standup', 'priority': 'high', 'due_date': day.isoformat()})
+        self.assertRedirects(response, reverse('todo-list'))
+        stored = Todo.objects.get(occurrence_of=self.rule, occurrence_date=day)
+        self.assertEqual(stored.title, 'Long standup')
+        self.assertFalse(stored.is_resolved)
+        self.assertNotIn(day, [o.due_date for o in self.window()])
+
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse('todo-update', args=[stored.pk]))
+
+    def test_complete_requires_post(self):
+        """Test a GET on the complete URL stores nothing"""
+        day = self.today + timedelta(days=1)
+        response = self.client.get(reverse('todo-occurrence-complete', args=[self.rule.pk, day.isoformat()]))
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Todo.objects.filter(occurrence_of=self.rule).exists())
+
+    def test_invalid_occurrence_dates_404(self):
+        """Test dates that aren't part of the series are rejected"""
+        for day in ['not-a-date', self.today.isoformat(), (self.today - timedelta(days=1)).isoformat()]:
+            response = self.client.get(reverse('todo-occurrence-edit', args=[self.rule.pk, day]))
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(Todo.objects.filter(occurrence_of=self.rule).exists())
+
+    def test_agenda_includes_occurrences(self):
+        """Test the agenda window shows computed occurrences by day"""
+        response = self.client.get(reverse('todo-agenda') + '?days=3')
+        self.assertEqual([t.due_date for t in response.context['todos']], [
+            self.today, self.today + timedelta(days=1), self.today + timedelta(days=2),
+        ])
+        self.assertContains(response, 'Upcoming')
+
+    def test_form_creates_updates_and_removes_rule(self):
+        """Test the repeat fields manage the recurrence rule"""
+        data = {'title': 'Report', 'priority': 'medium', 'due_date': self.today, 'repeat': 'weekly', 'repeat_interval': 2}
+        form = TodoForm(data=data)
+        self.assertTrue(form.is_valid(), form.errors)
+        todo = form.save()
+        self.assertEqual(todo.recurrence.describe(), 'every 2 weeks')
+
+        form = TodoForm(data=dict(data, repeat=''), instance=todo)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertFalse(RecurrenceRule.objects.filter(todo=todo).exists())
+
+    def test_form_requires_due_date_for_series(self):
+        """Test a series can't be started without a due date"""
+        form = TodoForm(data={'title': 'Report', 'priority': 'medium', 'repeat': 'daily'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('due_date', form.errors)
+
+    def test_stored_occurrence_cannot_start_a_series(self):
+        """Test the repeat fields are hidden for stored occurrences"""
+        stored = self.rule.materialize(self.today + timedelta(days=1))
+        self.assertNotIn('repeat', TodoForm(instance=stored).fields)
+
+
+# ============================================
+# MANUAL ORDER TESTS
+# ============================================
+
+class RankKeyTest(TestCase):
+    """Test cases for lexicographic rank keys"""
+
+    def test_midpoint_sorts_strictly_between(self):
+        """Test repeated inserts always find a key between two neighbours"""
+        keys = [ranking.rank_after('')]
+        for i in range(300):
+            # Alternate between hammering one gap and the ends of the list.
+            position = [1, len(keys), 0, len(keys) // 2][i % 4]
+            low = keys[position - 1] if position else ''
+            high = keys[position] if position < len(keys) else None
+            key = ranking.rank_between(low, high)
+            self.assertFalse(key.endswith('0'))
+            keys.insert(position, key)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_appends_keep_fixed_width(self):
+        """Test appending and prepending step the integer part instead of growing keys"""
+        key = ranking.rank_after('')
+        for _ in range(1000):
+            following = ranking.rank_after(key)
+            self.assertLess(key, following)
+            self.assertLessEqual(len(following), ranking.WIDTH)
+            key = following
+        self.assertLess(ranking.rank_before(key), key)
+        self.assertLessEqual(len(ranking.rank_before(key)), ranking.WIDTH)
+
+    def test_spread_is_sorted(self):
+        """Test rebalanced keys are evenly spaced and sorted"""
+        keys = ranking.spread(5000)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 5000)
+
+
+class TodoManualOrderTest(TestCase):
+    """Test cases for the manual sort mode and the reorder endpoint"""
+
+    fragment = {'HTTP_ACCEPT': 'application/json'}
+
+    def setUp(self):
+        self.a, self.b, self.c, self.d = [
+            Todo.objects.create(title=title, priority=priority)
+            for title, priority in [('A', 'low'), ('B', 'high'), ('C', 'medium'), ('D', 'low')]
+        ]
+
+    def manual_order(self):
+        return list(Todo.objects.order_by('rank', 'pk').values_list('title', flat=True))
+
+    def move(self, todo, before=None, after=None):
+        data = {'before': before.pk if before else '', 'after': after.pk if after else ''}
+        return self.client.post(reverse('todo-move', args=[todo.pk]), data, **self.fragment)
+
+    def test_new_todos_are_appended(self):
+        """Test creation order is the initial manual order"""
+        self.assertEqual(self.manual_order(), ['A', 'B', 'C', 'D'])
+
+    def test_move_updates_exactly_one_row(self):
+        """Test a move writes the moved TODO's rank and nothing else"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(self.d, before=self.a, after=self.b)
+        self.assertEqual(response.status_code, 200)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.manual_order(), ['A', 'D', 'B', 'C'])
+        self.assertEqual(response.json()['rank'], Todo.objects.get(pk=self.d.pk).rank)
+
+    def test_move_to_top(self):
+        """Test a move with only a following neighbour goes first"""
+        self.move(self.c, after=self.a)
+        self.assertEqual(self.manual_order(), ['C', 'A', 'B', 'D'])
+
+    def test_concurrent_moves_into_same_gap(self):
+        """Test two moves computed against the same stale neighbours both keep their place"""
+        self.move(self.c, before=self.a, after=self.b)
+        # The second client still believes A and B are adjacent.
+        self.move(self.d, before=self.a, after=self.b)
+        self.assertEqual(self.manual_order(), ['A', 'D', 'C', 'B'])
+        self.assertEqual(Todo.objects.values('rank').distinct().count(), 4)
+
+    def test_move_errors(self):
+        """Test moves without neighbours or with deleted neighbours are refused"""
+        self.assertEqual(self.move(self.a).status_code, 409)
+        gone = Todo.objects.create(title='Gone')
+        gone_pk = gone.pk
+        gone.delete()
+        gone.pk = gone_pk
+        self.assertEqual(self.move(self.a, before=gone).status_code, 409)
+        self.assertEqual(self.move(gone, before=self.a).status_code, 404)
+        self.assertEqual(self.client.get(reverse('todo-move', args=[self.a.pk])).status_code, 405)
+
+    def test_move_rejects_non_ascii_digits(self):
+        """Test neighbour ids that only look like digits are ignored, not a server error"""
+        response = self.client.post(reverse('todo-move', args=[self.a.pk]), {'before': '²'}, **self.fragment)
+        self.assertEqual(response.status_code, 409)
+
+    def test_move_without_javascript_redirects(self):
+        """Test the non-fragment flow returns to the manual list"""
+        response = self.client.post(reverse('todo-move', args=[self.a.pk]), {'before': self.d.pk})
+        self.assertRedirects(response, reverse('todo-list') + '?sort=manual')
+        self.assertEqual(self.manual_order(), ['B', 'C', 'D', 'A'])
+
+    def test_stale_save_keeps_new_rank(self):
+        """Test saving an instance loaded before a move doesn't undo it"""
+        stale = Todo.objects.get(pk=self.d.pk)
+        self.move(self.d, after=self.a)
+        stale.title = 'D renamed'
+        stale.save()
+        self.assertEqual(self.manual_order(), ['D renamed', 'A', 'B', 'C'])
+
+    def test_list_manual_sort_mode(self):
+        """Test ?sort=manual lists TODOs by rank regardless of priority"""
+        self.move(self.a, before=self.d)
+        response = self.client.get(reverse('todo-list') + '?sort=manual')
+        self.assertEqual([t.title for t in response.context['todos']], ['B', 'C', 'D', 'A'])
+        self.assertEqual(response.context['sort_mode'], 'manual')
+        self.assertContains(response, 'data-sort="manual"')
+
+        response = self.client.get(reverse('todo-list'))
+        self.assertEqual(response.context['todos'][0].title, 'C')
+
+    def test_manual_order_uses_rank_index(self):
+        """Test the manual ordering is answered from the rank index"""
+        plan = Todo.objects.order_by('rank', 'pk').explain()
+        self.assertIn('todo_rank_idx', plan)
+
+    def test_rebalance_command(self):
+        """Test rebalancing shortens long keys and preserves the order"""
+        for i in range(40):
+            self.move(self.d, before=self.a, after=Todo.objects.exclude(pk__in=[self.a.pk, self.d.pk]).order_by('rank').first())
+            self.move(self.c, before=self.a, after=self.d)
+        order = self.manual_order()
+        out = StringIO()
+        call_command('rebalance_ranks', '--max-length', '6', stdout=out)
+        self.assertIn('Rebalanced 4 TODOs', out.getvalue())
+        self.assertEqual(self.manual_order(), order)
+        self.assertTrue(all(len(rank) <= ranking.WIDTH for rank in Todo.objects.values_list('rank', flat=True)))
+
+        out = StringIO()
+        call_command('rebalance_ranks', stdout=out)
+        self.assertIn('no rebalance needed', out.getvalue())
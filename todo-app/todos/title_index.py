@@ -0,0 +1,178 @@
+"""In-process prefix index over the titles of active TODOs.
+
+Titles are normalized (whitespace collapsed, case folded) and kept in one
+sorted list of ``(title, id)`` keys, so every title starting with a prefix
+sits in one contiguous slice found with two ``bisect`` calls; no query per
+keystroke. Matches are ranked by priority, then by most recently created,
+and a title shared by several TODOs is suggested once.
+
+Like the tag index, it is built lazily from the database on first use, kept
+in sync by the receivers in ``todos.signals`` and held once per process.
+Each committed write bumps a version stamp in the default cache, so other
+processes sharing that cache rebuild on their next lookup (see
+``todos.index_version``). ``manage.py rebuild_title_index`` forces a rebuild
+everywhere.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from todo_project.signals import cache_lookup
+
+from .index_version import SharedVersion
+
+VERSION_CACHE_KEY = 'todos:title-index:version'
+PRIORITY_WEIGHTS = {'low': 0, 'medium': 1, 'high': 2}
+WHITESPACE = re.compile(r'\s+')
+# Sorts after any character a title can contain, closing the prefix range.
+MAX_CHARACTER = '\U0010ffff'
+# Only prefixes this short match enough titles to be worth memoizing, and at
+# most MEMO_SIZE of them are kept (least recently used go first).
+MEMO_PREFIX_LENGTH = 2
+MEMO_SIZE = 256
+
+
+def normalize(text):
+    return WHITESPACE.sub(' ', text).strip().casefold()
+
+
+class TitleIndex:
+    """Thread-safe prefix index from normalized titles to active TODOs."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = None
+        self._entries = {}
+        self._memo = OrderedDict()
+        self._version = None
+        self.shared_version = SharedVersion(VERSION_CACHE_KEY)
+
+    @property
+    def is_built(self):
+        return self._keys is not None
+
+    def reset(self):
+        """Drop the in-memory index; it will be rebuilt on next use."""
+        with self._lock:
+            self._keys = None
+            self._entries = {}
+            self._memo = OrderedDict()
+
+    def rebuild(self):
+        """Rebuild the whole index from the active TODOs in one query.
+
+        As in ``TagIndex.rebuild``, the version and the rows are read under
+        the lock incremental updates take, and updates are idempotent, so a
+        write committed meanwhile is never lost.
+        """
+        from .models import Todo
+
+        with self._lock:
+            version = self.shared_version.current()
+            rows = Todo.objects.filter(is_resolved=False).values_list('pk', 'title', 'priority', 'created_at')
+            entries = {
+                pk: self._entry(title, priority, created_at) for pk, title, priority, created_at in rows.iterator()
+            }
+            self._keys = sorted((entry[0], pk) for pk, entry in entries.items())
+            self._entries = entries
+            self._memo = OrderedDict()
+            self._version = version
+        return self.stats()
+
+    def invalidate(self):
+        """Ask every process sharing the default cache to rebuild its index."""
+        self.shared_version.bump()
+        self.reset()
+
+    def _ensure_built(self):
+        current = self._keys is not None and self.shared_version.current() == self._version
+        cache_lookup.send(sender='title_index', hit=current)
+        if not current:
+            self.rebuild()
+
+    def _apply(self, update, *args):
+        """Apply a committed write here and announce it to other processes."""
+        version = self.shared_version.bump()
+        with self._lock:
+            if self._keys is None:
+                return
+            if version == self._version + 1:
+                update(*args)
+                self._memo = OrderedDict()
+                self._version = version
+            else:
+                # Another process wrote in between; rebuild on the next lookup.
+                self.reset()
+
+    @staticmethod
+    def _entry(title, priority, created_at):
+        return (normalize(title), title, priority, (PRIORITY_WEIGHTS.get(priority, 0), created_at.timestamp()))
+
+    def search(self, prefix, limit=8):
+        """Return up to ``limit`` ``(id, title, priority)`` matches for ``prefix``.
+
+        Ranked by priority (high first), then newest first. Results for
+        short prefixes, which match many titles and get typed over and over,
+        are memoized in a small LRU until the index next changes.
+        """
+        prefix = WHITESPACE.sub(' ', prefix).lstrip().casefold()
+        if not prefix or limit < 1:
+            return []
+        self._ensure_built()
+        with self._lock:
+            memo_key = (prefix, limit) if len(prefix) <= MEMO_PREFIX_LENGTH else None
+            if memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+            start = bisect_left(self._keys, (prefix,))
+            stop = bisect_left(self._keys, (prefix + MAX_CHARACTER,), start)
+            best = {}
+            for title_key, pk in self._keys[start:stop]:
+                rank = self._entries[pk][3] + (pk,)
+                if title_key not in best or rank > best[title_key][0]:
+                    best[title_key] = (rank, pk)
+            top = heapq.nlargest(limit, best.values())
+            results = [(pk, self._entries[pk][1], self._entries[pk][2]) for _, pk in top]
+            if memo_key is not None:
+                self._memo[memo_key] = results
+                if len(self._memo) > MEMO_SIZE:
+                    self._memo.popitem(last=False)
+        return results
+
+    def stats(self):
+        """Return a summary of the index for diagnostics."""
+        with self._lock:
+            keys = self._keys or []
+            return {
+                'titles': len(keys),
+                'distinct': len({title_key for title_key, _ in keys}),
+            }
+
+    # ----------------------------------------
+    # Incremental maintenance, called once a write commits
+    # ----------------------------------------
+
+    def update(self, todo_id, title, priority, created_at, active):
+        """Re-index one TODO after it was saved; resolved TODOs are dropped."""
+        self._apply(self._update, todo_id, title, priority, created_at, active)
+
+    def discard(self, todo_id):
+        self._apply(self._remove, todo_id)
+
+    def _update(self, todo_id, title, priority, created_at, active):
+        self._remove(todo_id)
+        if active:
+            entry = self._entry(title, priority, created_at)
+            self._entries[todo_id] = entry
+            insort(self._keys, (entry[0], todo_id))
+
+    def _remove(self, todo_id):
+        entry = self._entries.pop(todo_id, None)
+        if entry is not None:
+            position = bisect_left(self._keys, (entry[0], todo_id))
+            del self._keys[position]
+
+
+title_index = TitleIndex()
@@ -8,6 +8,13 @@ urlpatterns = [
     path('todo/<int:pk>/edit/', views.TodoUpdateView.as_view(), name='todo-update'),
     path('todo/<int:pk>/delete/', views.TodoDeleteView.as_view(), name='todo-delete'),
     path('todo/<int:pk>/toggle/', views.toggle_todo, name='todo-toggle'),
+    path('todo/<int:pk>/move/', views.move_todo, name='todo-move'),
+    path('recurring/<int:rule_pk>/<str:day>/edit/', views.occurrence_edit, name='todo-occurrence-edit'),
+    path('recurring/<int:rule_pk>/<str:day>/complete/', views.occurrence_complete, name='todo-occurrence-complete'),
+    path('autocomplete/', views.autocomplete_titles, name='todo-autocomplete'),
+    path('calendar/', views.TodoCalendarView.as_view(), name='todo-calendar'),
+    path('calendar/<int:year>/<int:month>/', views.TodoCalendarView.as_view(), name='todo-calendar-month'),
+    path('agenda/', views.TodoAgendaView.as_view(), name='todo-agenda'),
 ]
 
 
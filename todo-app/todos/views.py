@@ -1,9 +1,105 @@
+import calendar
+from datetime import date, timedelta
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from django.contrib import messages
-from .models import Todo
+from .models import RecurrenceRule, Tag, Todo
 from .forms import TodoForm
+from . import ranking
+from .recurrence import OccurrenceMergedList, expand_window, occurs_on, sort_like
+from .schedule import get_month_summary
+from .tag_index import tag_index
+from .title_index import title_index
+
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+def todo_counts():
+    """Total/active/completed counts in a single aggregate query."""
+    counts = Todo.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_resolved=False)),
+    )
+    counts['completed'] = counts['total'] - counts['active']
+    return counts
+
+
+# ============================================
+# FRAGMENT RESPONSES
+# ============================================
+# Clients that send ``Accept: application/json`` or ``X-Fragment: 1`` get the
+# re-rendered card (or its removal) plus fresh counters instead of a redirect
+# to the full list page. Everyone else keeps the redirect flow.
+
+def wants_fragment(request):
+    return (
+        request.headers.get('X-Fragment') == '1'
+        or 'application/json' in request.headers.get('Accept', '')
+    )
+
+
+def card_fragment_response(request, todo, message, replaces=None):
+    """JSON with the card HTML for ``todo``, or its removal if the list filters hide it.
+
+    ``replaces`` names the DOM id of a different card the new one stands in
+    for, such as the computed occurrence a stored TODO was just created from.
+    """
+    filter_type = request.GET.get('filter', 'all')
+    visible = (
+        filter_type == 'all'
+        or (filter_type == 'active' and not todo.is_resolved)
+        or (filter_type == 'completed' and todo.is_resolved)
+    )
+    tags = request.GET.getlist('tag')
+    if visible and tags:
+        match = 'any' if request.GET.get('match') == 'any' else 'all'
+        visible = todo.pk in set(tag_index.lookup(tags, match=match))
+    html = render_to_string('todos/_todo_card.html', {'todo': todo}, request) if visible else ''
+    return JsonResponse({
+        'id': todo.pk,
+        'replaces': replaces,
+        'removed': not visible,
+        'html': html,
+        'counts': todo_counts(),
+        'message': message,
+    })
+
+
+def removal_fragment_response(pk, message):
+    return JsonResponse({
+        'id': pk,
+        'removed': True,
+        'html': '',
+        'counts': todo_counts(),
+        'message': message,
+    })
+
+
+class FragmentFormMixin:
+    """Answer fragment requests to create/update forms with the card instead of a redirect."""
+    success_message = ''
+
+    def form_valid(self, form):
+        if wants_fragment(self.request):
+            self.object = form.save()
+            return card_fragment_response(self.request, self.object, self.success_message)
+        messages.success(self.request, self.success_message)
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        if wants_fragment(self.request):
+            return JsonResponse({'errors': form.errors}, status=400)
+        return super().form_invalid(form)
 
 
 class TodoListView(ListView):
@@ -12,27 +108,73 @@ class TodoListView(ListView):
     template_name = 'todos/todo_list.html'
     context_object_name = 'todos'
     paginate_by = 20
+    recurrence_window_days = 14
 
     def get_queryset(self):
         """Filter todos based on query parameters."""
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('parent', 'recurrence').prefetch_related('tags')
         filter_type = self.request.GET.get('filter', 'all')
 
+        if self.get_sort_mode() == 'manual':
+            queryset = queryset.order_by('rank', 'pk')
+
         if filter_type == 'active':
             queryset = queryset.filter(is_resolved=False)
         elif filter_type == 'completed':
             queryset = queryset.filter(is_resolved=True)
 
+        # Tag combinations are resolved by the in-memory index, not by joins.
+        tags = self.request.GET.getlist('tag')
+        if tags:
+            queryset = queryset.filter(pk__in=tag_index.lookup(tags, match=self.get_tag_match()))
+
         return queryset
 
+    def get_sort_mode(self):
+        return 'manual' if self.request.GET.get('sort') == 'manual' else 'default'
+
+    def get_occurrences(self):
+        """Upcoming occurrences of recurring TODOs that pass the current filters."""
+        # Occurrences have no place of their own in the hand-made order.
+        if self.request.GET.get('filter') == 'completed' or self.get_sort_mode() == 'manual':
+            return []
+        today = timezone.now().date()
+        occurrences = expand_window(today, today + timedelta(days=self.recurrence_window_days))
+        tags = self.request.GET.getlist('tag')
+        if tags:
+            matching = set(tag_index.lookup(tags, match=self.get_tag_match()))
+            occurrences = [o for o in occurrences if o.series_id in matching]
+        return occurrences
+
+    def get_tag_match(self):
+        return 'any' if self.request.GET.get('match') == 'any' else 'all'
+
+    def get_tag_toggle_query(self, name):
+        """Query string that adds ``name`` to, or removes it from, the tag filter."""
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        tags = query.getlist('tag')
+        query.setlist('tag', [t for t in tags if t != name] if name in tags else tags + [name])
+        return query.urlencode()
+
     def get_context_data(self, **kwargs):
+        # Occurrences are spliced into the ordering before the paginator slices it.
+        kwargs.setdefault('object_list', OccurrenceMergedList(self.object_list, self.get_occurrences()))
         context = super().get_context_data(**kwargs)
         context['filter_type'] = self.request.GET.get('filter', 'all')
+        context['selected_tags'] = self.request.GET.getlist('tag')
+        context['all_tags'] = list(Tag.objects.all())
+        for tag in context['all_tags']:
+            tag.is_selected = tag.name in context['selected_tags']
+            tag.toggle_query = self.get_tag_toggle_query(tag.name)
+        context['tag_match'] = self.get_tag_match()
+        context['sort_mode'] = self.get_sort_mode()
 
         # Count statistics
-        context['total_count'] = Todo.objects.count()
-        context['active_count'] = Todo.objects.filter(is_resolved=False).count()
-        context['completed_count'] = Todo.objects.filter(is_resolved=True).count()
+        counts = todo_counts()
+        context['total_count'] = counts['total']
+        context['active_count'] = counts['active']
+        context['completed_count'] = counts['completed']
 
         return context
 
@@ -43,29 +185,43 @@ class TodoDetailView(DetailView):
     template_name = 'todos/todo_detail.html'
     context_object_name = 'todo'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        todo = self.object
+        context['ancestors'] = todo.get_ancestors() if todo.parent_id else []
+        context['recurrence'] = RecurrenceRule.objects.filter(todo=todo).first()
+        context['series'] = todo.occurrence_of.todo if todo.occurrence_of_id else None
+        subtasks = list(todo.get_descendants()) if todo.has_subtasks else []
+        for subtask in subtasks:
+            subtask.relative_depth = subtask.depth - todo.depth - 1
+        context['subtasks'] = subtasks
+        return context
+
 
-class TodoCreateView(CreateView):
+class TodoCreateView(FragmentFormMixin, CreateView):
     """View to create a new TODO."""
     model = Todo
     form_class = TodoForm
     template_name = 'todos/todo_form.html'
     success_url = reverse_lazy('todo-list')
+    success_message = 'TODO created successfully!'
 
-    def form_valid(self, form):
-        messages.success(self.request, 'TODO created successfully!')
-        return super().form_valid(form)
+    def get_initial(self):
+        """Pre-select the parent when adding a subtask from a detail page."""
+        initial = super().get_initial()
+        parent = self.request.GET.get('parent')
+        if parent and parent.isdigit():
+            initial['parent'] = parent
+        return initial
 
 
-class TodoUpdateView(UpdateView):
+class TodoUpdateView(FragmentFormMixin, UpdateView):
     """View to update an existing TODO."""
     model = Todo
     form_class = TodoForm
     template_name = 'todos/todo_form.html'
     success_url = reverse_lazy('todo-list')
-
-    def form_valid(self, form):
-        messages.success(self.request, 'TODO updated successfully!')
-        return super().form_valid(form)
+    success_message = 'TODO updated successfully!'
 
 
 class TodoDeleteView(DeleteView):
@@ -74,18 +230,212 @@ class TodoDeleteView(DeleteView):
     template_name = 'todos/todo_confirm_delete.html'
     success_url = reverse_lazy('todo-list')
 
-    def delete(self, request, *args, **kwargs):
-        messages.success(self.request, 'TODO deleted successfully!')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        message = 'TODO deleted successfully!'
+        if wants_fragment(self.request):
+            pk = self.object.pk
+            self.object.delete()
+            return removal_fragment_response(pk, message)
+        messages.success(self.request, message)
+        return super().form_valid(form)
+
+
+class TodoCalendarView(TemplateView):
+    """Month calendar of TODOs by due date, served from cached per-day counts."""
+    template_name = 'todos/todo_calendar.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.now().date()
+        year = self.kwargs.get('year', today.year)
+        month = self.kwargs.get('month', today.month)
+        # The grid and the previous/next links reach into the neighbouring
+        # months, so the first and last years ``date`` supports are excluded.
+        if not 1 <= month <= 12 or not 2 <= year <= 9998:
+            raise Http404('Invalid month')
+
+        summary = get_month_summary(year, month)
+        weeks = [
+            [
+                {
+                    'date': day,
+                    'in_month': day.month == month,
+                    'is_today': day == today,
+                    'summary': summary.get(day) if day.month == month else None,
+                }
+                for day in week
+            ]
+            for week in calendar.Calendar().monthdatescalendar(year, month)
+        ]
+        first = date(year, month, 1)
+        previous_month = first - timedelta(days=1)
+        next_month = first + timedelta(days=calendar.monthrange(year, month)[1])
+
+        context.update({
+            'month': first,
+            'weeks': weeks,
+            'weekday_names': [calendar.day_abbr[(calendar.firstweekday() + i) % 7] for i in range(7)],
+            'previous_month': previous_month,
+            'next_month': next_month,
+        })
+        return context
+
+
+class TodoAgendaView(ListView):
+    """TODOs due in a date window, grouped by day; loaded only on demand."""
+    model = Todo
+    template_name = 'todos/todo_agenda.html'
+    context_object_name = 'todos'
+    default_days = 14
+    max_days = 62
+
+    def get_window(self):
+        try:
+            start = date.fromisoformat(self.request.GET['start'])
+        except (KeyError, ValueError):
+            start = timezone.now().date()
+        if start > date.max - timedelta(days=self.max_days):
+            # Too close to the last representable date for a window to fit.
+            start = timezone.now().date()
+        try:
+            days = int(self.request.GET.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+        return start, max(1, min(days, self.max_days))
+
+    def get_queryset(self):
+        start, days = self.get_window()
+        queryset = (
+            Todo.objects.filter(due_date__gte=start, due_date__lt=start + timedelta(days=days))
+            .order_by('due_date', 'is_resolved', '-priority', 'title')
+        )
+        # The whole window is shown at once, so occurrences are merged in memory.
+        occurrences = expand_window(start, start + timedelta(days=days))
+        return sort_like(list(queryset) + occurrences, queryset.query.order_by)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        start, days = self.get_window()
+        context['start'] = start
+        context['end'] = start + timedelta(days=days - 1)
+        context['days'] = days
+        return context
 
 
+@require_http_methods(['GET', 'POST'])
 def toggle_todo(request, pk):
     """Toggle the resolved status of a TODO."""
-    todo = get_object_or_404(Todo, pk=pk)
+    todo = get_object_or_404(Todo.objects.select_related('parent'), pk=pk)
     todo.is_resolved = not todo.is_resolved
     todo.save()
 
     status = "completed" if todo.is_resolved else "reopened"
-    messages.success(request, f'TODO marked as {status}!')
+    message = f'TODO marked as {status}!'
+    if wants_fragment(request):
+        return card_fragment_response(request, todo, message)
+    messages.success(request, message)
+
+    return redirect('todo-list')
+
+
+@require_http_methods(['POST'])
+def move_todo(request, pk):
+    """Move a TODO in the manual order to just after ``before`` (or just before ``after``)."""
+    neighbours = {}
+    for name in ('before', 'after'):
+        value = request.POST.get(name, '')
+        neighbours[name] = int(value) if value.isascii() and value.isdigit() else None
+    try:
+        rank = ranking.move(pk, **neighbours)
+    except Todo.DoesNotExist:
+        raise Http404('TODO not found')
+    except (ranking.RankError, OperationalError) as error:
+        if isinstance(error, OperationalError):
+            if 'locked' not in str(error):
+                raise
+            error = 'Another change is being saved; please try again.'
+        if wants_fragment(request):
+            return JsonResponse({'error': str(error)}, status=409)
+        messages.error(request, str(error))
+        return redirect(reverse('todo-list') + '?sort=manual')
+
+    if wants_fragment(request):
+        return JsonResponse({'id': pk, 'rank': rank})
+    return redirect(reverse('todo-list') + '?sort=manual')
+
+
+@require_http_methods(['GET'])
+def autocomplete_titles(request):
+    """Suggest active TODO titles starting with ``q``, from the in-memory title index."""
+    query = request.GET.get('q', '')[:200]
+    try:
+        limit = max(1, min(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    results = [
+        {'id': pk, 'title': title, 'priority': priority, 'url': reverse('todo-detail', args=[pk])}
+        for pk, title, priority in title_index.search(query, limit)
+    ]
+    return JsonResponse({'query': query, 'results': results})
+
+
+def get_occurrence(rule_pk, day):
+    """The rule and date of a computed occurrence from URL arguments, or 404."""
+    rule = get_object_or_404(RecurrenceRule.objects.select_related('todo'), pk=rule_pk)
+    try:
+        day = date.fromisoformat(day)
+    except ValueError:
+        raise Http404('Invalid date')
+    if not occurs_on(rule, day):
+        raise Http404('No occurrence on that date')
+    return rule, day
+
+
+@require_http_methods(['GET', 'POST'])
+def occurrence_edit(request, rule_pk, day):
+    """Edit a computed occurrence; it is only stored once the form is submitted."""
+    rule, day = get_occurrence(rule_pk, day)
+    stored = Todo.objects.filter(occurrence_of=rule, occurrence_date=day).first()
+    if stored is not None:
+        return redirect('todo-update', pk=stored.pk)
+
+    instance = Todo(occurrence_of=rule, occurrence_date=day)
+    if request.method == 'POST':
+        form = TodoForm(request.POST, instance=instance)
+        if form.is_valid():
+            try:
+                with transaction.atomic():
+                    form.save()
+            except IntegrityError:
+                # Stored by a concurrent edit or completion; continue on that row.
+                stored = Todo.objects.get(occurrence_of=rule, occurrence_date=day)
+                return redirect('todo-update', pk=stored.pk)
+            messages.success(request, 'TODO updated successfully!')
+            return redirect('todo-list')
+    else:
+        series = rule.todo
+        form = TodoForm(instance=instance, initial={
+            'title': series.title,
+            'description': series.description,
+            'priority': series.priority,
+            'due_date': day,
+            'parent': series.parent_id,
+            'tags': list(series.tags.all()),
+        })
+    return render(request, 'todos/todo_form.html', {'form': form})
+
+
+@require_http_methods(['POST'])
+def occurrence_complete(request, rule_pk, day):
+    """Store a computed occurrence as a real TODO and mark it completed."""
+    rule, day = get_occurrence(rule_pk, day)
+    todo = rule.materialize(day)
+    if not todo.is_resolved:
+        todo.is_resolved = True
+        todo.save()
+    message = 'TODO marked as completed!'
+    if wants_fragment(request):
+        return card_fragment_response(request, todo, message, replaces=f'occurrence-{rule.pk}-{day:%Y%m%d}')
+    messages.success(request, message)
 
     return redirect('todo-list')